@@ -0,0 +1,66 @@
+"""Кодирование ответов API: JSON и сжатие.
+
+orjson и brotli необязательны: без orjson работает стандартный json,
+без brotli ответы сжимаются только gzip.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# ответы короче этого не сжимаются: заголовки gzip съедят выигрыш
+MIN_COMPRESS_SIZE = 200
+BROTLI_QUALITY = 5
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(
+        data, cls=DjangoJSONEncoder, ensure_ascii=False
+    ).encode()
+
+
+def accepted_encodings(request):
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    encodings = set()
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00'):
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def compress(request, content):
+    """Сжимает content в лучший формат из Accept-Encoding клиента."""
+    if len(content) < MIN_COMPRESS_SIZE:
+        return content, None
+    encodings = accepted_encodings(request)
+    if brotli is not None and 'br' in encodings:
+        return brotli.compress(content, quality=BROTLI_QUALITY), 'br'
+    if 'gzip' in encodings:
+        return compress_string(content), 'gzip'
+    return content, None
+
+
+def json_response(request, data, status=200):
+    content, encoding = compress(request, dumps(data))
+    response = HttpResponse(
+        content, content_type='application/json', status=status
+    )
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,116 @@
+import gzip
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(POST_LIMIT_PER_PAGE=3, COMMENTS_PER_PAGE=2)
+class ApiViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {n}'
+            )
+            for n in range(5)
+        ]
+        for n in range(3):
+            Comment.objects.create(
+                author=cls.reader, post=cls.posts[0], text=f'Ответ {n}'
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def get(self, url, client=None, **params):
+        response = (client or self.client).get(url, params)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return response, json.loads(response.content)
+
+    def walk(self, url, client=None, **params):
+        """Все записи ленты, пройденные по курсору next."""
+        texts = []
+        while True:
+            response, data = self.get(url, client, **params)
+            self.assertEqual(response.status_code, 200, data)
+            texts += [item['text'] for item in data['results']]
+            if data['next'] is None:
+                return texts
+            params['after'] = data['next']
+
+    def test_feeds_paginate_by_cursor(self):
+        """Все ленты отдают посты от новых к старым без повторов."""
+        reader = Client()
+        reader.force_login(self.reader)
+        expected = [f'Пост {n}' for n in reversed(range(5))]
+        urls = {
+            'index': reverse('api:index'),
+            'group_list': reverse('api:group_list', args=[self.group.slug]),
+            'profile': reverse('api:profile', args=[self.author.username]),
+            'follow_index': reverse('api:follow_index'),
+        }
+        for name, url in urls.items():
+            with self.subTest(view=name):
+                self.assertEqual(self.walk(url, reader), expected)
+
+    def test_fields_projection(self):
+        _, data = self.get(reverse('api:index'), fields='id,author')
+        self.assertEqual(
+            data['results'][0],
+            {'id': self.posts[-1].pk, 'author': 'author'},
+        )
+        response, data = self.get(reverse('api:index'), fields='id,secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', data['error'])
+
+    def test_post_detail_with_comments(self):
+        post = self.posts[0]
+        url = reverse('api:post_detail', args=[post.pk])
+        with CaptureQueriesContext(connection) as queries:
+            _, data = self.get(url, comment_fields='text')
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(data['post']['text'], post.text)
+        self.assertEqual(data['post']['group'], self.group.slug)
+        self.assertEqual(
+            data['comments']['results'],
+            [{'text': 'Ответ 0'}, {'text': 'Ответ 1'}],
+        )
+        comments_url = reverse('api:comments', args=[post.pk])
+        self.assertEqual(
+            self.walk(comments_url), ['Ответ 0', 'Ответ 1', 'Ответ 2']
+        )
+
+    def test_errors(self):
+        cases = {
+            reverse('api:post_detail', args=[0]): 404,
+            reverse('api:group_list', args=['missing']): 404,
+            reverse('api:follow_index'): 401,
+            reverse('api:index') + '?limit=0': 400,
+            reverse('api:index') + '?after=broken': 400,
+        }
+        for url, status in cases.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('error', json.loads(response.content))
+
+    def test_gzip(self):
+        """Ответ сжимается, если клиент принимает gzip."""
+        response = self.client.get(
+            reverse('api:index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(data['results']), 3)
@@ -0,0 +1,184 @@
+"""JSON API лент и поста для мобильных клиентов.
+
+Записи читаются через values() и кодируются без создания объектов
+моделей. Ленты листаются курсором ?after= (поле next ответа),
+размер страницы — ?limit=, набор полей — ?fields=id,text,...
+"""
+import functools
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.views.decorators.http import require_safe
+
+from posts.feed import FEED_CURSOR, follow_feed
+from posts.models import Comment, Group, Post, User
+from posts.utils import cursor_paginate, decode_cursor
+
+from .encoding import json_response
+
+# имя поля в ответе: поле values()
+POST_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated_at': 'updated_at',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+COMMENT_FIELDS = {
+    'id': 'pk',
+    'author': 'author__username',
+    'text': 'text',
+    'pub_date': 'pub_date',
+}
+TRANSFORMS = {
+    'image': lambda name: default_storage.url(name) if name else None,
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def api_view(view):
+    """Отдаёт результат view как JSON, ApiError — как ответ с ошибкой."""
+    @require_safe
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            data, status = view(request, *args, **kwargs), 200
+        except ApiError as exc:
+            data, status = {'error': exc.message}, exc.status
+        return json_response(request, data, status)
+    return wrapper
+
+
+def get_pk(queryset):
+    pk = queryset.values_list('pk', flat=True).first()
+    if pk is None:
+        raise ApiError(404, 'Не найдено')
+    return pk
+
+
+def projection(request, fields, param='fields'):
+    """Поля ответа из ?fields=; без параметра — все."""
+    names = [name for name in request.GET.get(param, '').split(',') if name]
+    if not names:
+        return fields
+    unknown = set(names) - fields.keys()
+    if unknown:
+        raise ApiError(400, f'Неизвестные поля: {", ".join(sorted(unknown))}')
+    return {name: fields[name] for name in names}
+
+
+def page_limit(request, default):
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        raise ApiError(400, 'limit должен быть числом')
+    if not 1 <= limit <= settings.API_MAX_LIMIT:
+        raise ApiError(
+            400, f'limit должен быть от 1 до {settings.API_MAX_LIMIT}'
+        )
+    return limit
+
+
+def page_after(request):
+    cursor = request.GET.get('after')
+    if not cursor:
+        return None
+    after = decode_cursor(cursor)
+    if after is None:
+        raise ApiError(400, 'Неверный курсор after')
+    return after
+
+
+def serialize(row, fields):
+    return {
+        name: TRANSFORMS[name](row[lookup]) if name in TRANSFORMS
+        else row[lookup]
+        for name, lookup in fields.items()
+    }
+
+
+def page(request, queryset, fields, default_limit, descending=True,
+         cursor=('pub_date', 'pk')):
+    """Страница values() по курсору: {'results': [...], 'next': курсор}."""
+    field, key = cursor
+    # поля курсора нужны, даже если их нет среди полей ответа
+    lookups = {field, key, *fields.values()}
+    rows = cursor_paginate(
+        queryset.values(*lookups),
+        after=page_after(request),
+        per_page=page_limit(request, default_limit),
+        field=field,
+        descending=descending,
+        key=key,
+    )
+    return {
+        'results': [serialize(row, fields) for row in rows],
+        'next': rows.next_cursor,
+    }
+
+
+def feed(request, posts, cursor=('pub_date', 'pk')):
+    return page(
+        request, posts, projection(request, POST_FIELDS),
+        settings.POST_LIMIT_PER_PAGE, cursor=cursor,
+    )
+
+
+@api_view
+def index(request):
+    return feed(request, Post.objects.all())
+
+
+@api_view
+def group_posts(request, slug):
+    group_id = get_pk(Group.objects.filter(slug=slug))
+    return feed(request, Post.objects.filter(group_id=group_id))
+
+
+@api_view
+def profile(request, username):
+    author_id = get_pk(User.objects.filter(username=username))
+    return feed(request, Post.objects.filter(author_id=author_id))
+
+
+@api_view
+def follow_index(request):
+    if not request.user.is_authenticated:
+        raise ApiError(401, 'Нужно войти')
+    return feed(request, follow_feed(request.user), FEED_CURSOR)
+
+
+def comments_page(request, post_id, param='fields'):
+    return page(
+        request, Comment.objects.filter(post_id=post_id),
+        projection(request, COMMENT_FIELDS, param),
+        settings.COMMENTS_PER_PAGE, descending=False,
+    )
+
+
+@api_view
+def post_detail(request, post_id):
+    """Пост и первая страница комментариев (?comment_fields=)."""
+    fields = projection(request, POST_FIELDS)
+    post = Post.objects.filter(pk=post_id).values(*fields.values()).first()
+    if post is None:
+        raise ApiError(404, 'Не найдено')
+    return {
+        'post': serialize(post, fields),
+        'comments': comments_page(request, post_id, 'comment_fields'),
+    }
+
+
+@api_view
+def comments(request, post_id):
+    get_pk(Post.objects.filter(pk=post_id))
+    return comments_page(request, post_id)
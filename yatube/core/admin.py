@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'name', 'status', 'attempts', 'run_at', 'finished_at',
+        'duration',
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('key',)
+    readonly_fields = ('worker', 'last_error')
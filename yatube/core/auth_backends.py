@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+
+def user_cache_key(user_id):
+    return f'user:{user_id}'
+
+
+def cached_fields():
+    """Поля пользователя в кеше: все, кроме хеша пароля."""
+    return [
+        field.attname for field in get_user_model()._meta.concrete_fields
+        if field.attname != 'password'
+    ]
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя запроса из кеша.
+
+    AuthenticationMiddleware на каждом запросе с сессией загружает
+    пользователя по id; здесь он читается из кеша и только при промахе
+    из базы. Запись сбрасывается при любом сохранении пользователя
+    (смена и сброс пароля, вход, правка в админке) — core.signals, —
+    так что проверка хеша пароля в сессии видит новый пароль сразу.
+
+    Хеш пароля в кеш не попадает: там лежат остальные поля и HMAC для
+    проверки сессии (get_session_auth_hash). У пользователя из кеша
+    пароль — отложенное поле: он читается из базы, только если нужен,
+    и save() его не перезаписывает.
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        entry = cache.get(key)
+        if entry is None:
+            # копия базы может отстать: после смены пароля в кеш попал
+            # бы прежний хеш сессии, поэтому пользователь читается
+            # с основной базы
+            manager = get_user_model()._default_manager
+            user = manager.db_manager(DEFAULT_DB_ALIAS).filter(
+                pk=user_id
+            ).first()
+            if user is None:
+                return None
+            cache.set(key, self.freeze(user), settings.USER_CACHE_TIMEOUT)
+        else:
+            user = self.thaw(entry)
+        return user if self.user_can_authenticate(user) else None
+
+    def freeze(self, user):
+        values = {name: getattr(user, name) for name in cached_fields()}
+        return values, user.get_session_auth_hash()
+
+    def thaw(self, entry):
+        values, session_hash = entry
+        user = get_user_model().from_db(
+            DEFAULT_DB_ALIAS, list(values), list(values.values())
+        )
+
+        def get_session_auth_hash():
+            # после set_password хеш сессии считается от нового пароля
+            if 'password' in user.get_deferred_fields():
+                return session_hash
+            return type(user).get_session_auth_hash(user)
+
+        user.get_session_auth_hash = get_session_auth_hash
+        return user
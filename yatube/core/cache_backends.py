@@ -0,0 +1,286 @@
+"""Кеш, общий для всех процессов сервера.
+
+SQLiteCache хранит записи в одном файле SQLite в режиме WAL: его видят
+все воркеры gunicorn, так что промах и сброс случаются один раз, а не
+в каждом процессе. TieredCache ставит перед общим кешем небольшой
+LocMemCache с коротким сроком жизни, чтобы горячие ключи читались
+из памяти процесса.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from .metrics import count_cache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+)
+CULL_EVERY = 100
+
+
+class SQLiteCache(BaseCache):
+    """Кеш в файле SQLite; LOCATION — путь к файлу."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None or getattr(self._local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self._path, timeout=10, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute(SCHEMA)
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _expires(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    def _dump(self, value):
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def _fresh(self, expires):
+        return expires is None or expires > time.time()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        self._maybe_cull()
+        cursor = self._db.execute(
+            'INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET '
+            'value = excluded.value, expires = excluded.expires '
+            'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+            (key, self._dump(value), self._expires(timeout), time.time())
+        )
+        return cursor.rowcount == 1
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        if not keys:
+            return {}
+        made = {self._key(key, version): key for key in keys}
+        placeholders = ', '.join('?' * len(made))
+        rows = self._db.execute(
+            f'SELECT key, value, expires FROM cache '
+            f'WHERE key IN ({placeholders})',
+            list(made)
+        ).fetchall()
+        found = {
+            made[key]: pickle.loads(value)
+            for key, value, expires in rows if self._fresh(expires)
+        }
+        count_cache(len(found), len(made) - len(found))
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self._expires(timeout)
+        self._maybe_cull()
+        self._db.executemany(
+            'INSERT OR REPLACE INTO cache (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            [
+                (self._key(key, version), self._dump(value), expires)
+                for key, value in data.items()
+            ]
+        )
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._expires(timeout), self._key(key, version), time.time())
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        self._db.executemany(
+            'DELETE FROM cache WHERE key = ?',
+            [(self._key(key, version),) for key in keys]
+        )
+
+    def has_key(self, key, version=None):
+        return key in self.get_many([key], version=version)
+
+    def incr(self, key, delta=1, version=None):
+        """Атомарно: читает и пишет в одной транзакции BEGIN IMMEDIATE."""
+        made = self._key(key, version)
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute(
+                'SELECT value, expires FROM cache WHERE key = ?', (made,)
+            ).fetchone()
+            if row is None or not self._fresh(row[1]):
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            db.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (self._dump(value), made)
+            )
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        return value
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # соединение живёт весь срок потока, как у LocMemCache
+        pass
+
+    def _maybe_cull(self):
+        self._writes += 1
+        if self._writes % CULL_EVERY:
+            return
+        db = self._db
+        db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        count = db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count > self._max_entries and self._cull_frequency:
+            db.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY expires IS NULL, expires '
+                'LIMIT ?)',
+                (count // self._cull_frequency,)
+            )
+
+
+class CountingLocMemCache(LocMemCache):
+    """LocMemCache, который сообщает попадания и промахи в core.metrics."""
+
+    _missing = object()
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, self._missing, version)
+        if value is self._missing:
+            count_cache(0, 1)
+            return default
+        count_cache(1, 0)
+        return value
+
+
+class TieredCache(BaseCache):
+    """Локальный LocMemCache (L1) перед общим кешем (L2).
+
+    OPTIONS:
+        SHARED — имя кеша L2 из CACHES;
+        LOCAL_TIMEOUT — сколько секунд L1 хранит значение;
+        LOCAL_MAX_ENTRIES — размер L1;
+        LOCAL_BYPASS — префиксы ключей, которые читаются только из L2
+        (токены сброса, блокировки: их изменения нужны всем процессам
+        сразу).
+
+    Запись идёт в оба уровня. Удаление в другом процессе доходит до L1
+    этого процесса не позже чем через LOCAL_TIMEOUT секунд.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options['SHARED']
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self._bypass = tuple(options.get('LOCAL_BYPASS', ()))
+        self._l1 = LocMemCache(f'tiered-{location}', {
+            'TIMEOUT': self._local_timeout,
+            'OPTIONS': {
+                'MAX_ENTRIES': options.get('LOCAL_MAX_ENTRIES', 1000),
+            },
+        })
+
+    @property
+    def _l2(self):
+        return caches[self._shared_alias]
+
+    def _local(self, key):
+        return not key.startswith(self._bypass)
+
+    def _l1_timeout(self, timeout):
+        if timeout == DEFAULT_TIMEOUT or timeout is None:
+            return self._local_timeout
+        return min(timeout, self._local_timeout)
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        local_keys = [key for key in keys if self._local(key)]
+        found = self._l1.get_many(local_keys, version=version)
+        # промахи L1 досчитает L2
+        count_cache(len(found), 0)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared = self._l2.get_many(missing, version=version)
+            self._l1.set_many(
+                {key: value for key, value in shared.items()
+                 if self._local(key)},
+                self._local_timeout, version=version
+            )
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self._l2.set_many(data, timeout, version=version)
+        self._l1.set_many(
+            {key: value for key, value in data.items() if self._local(key)},
+            self._l1_timeout(timeout), version=version
+        )
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._l1.delete(key, version=version)
+        return self._l2.add(key, value, timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._l2.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._l1.delete(key, version=version)
+        return self._l2.incr(key, delta, version=version)
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        self._l1.delete_many(keys, version=version)
+        self._l2.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        return key in self.get_many([key], version=version)
+
+    def clear(self):
+        self._l1.clear()
+        self._l2.clear()
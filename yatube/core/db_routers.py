@@ -0,0 +1,52 @@
+"""Чтение с копий базы, запись в основную.
+
+Копии (settings.DATABASE_REPLICAS) обслуживают только чтение внутри
+запросов, которые ReplicaMiddleware не закрепил за основной базой.
+Вне запросов — команды, воркеры, тесты без middleware — всё читается
+с основной базы, чтобы не увидеть устаревшие данные после своей же
+записи.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_state = ContextVar('db_routing', default=None)
+
+
+class RoutingState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def start(pinned):
+    state = RoutingState(pinned)
+    return state, _state.set(state)
+
+
+def stop(token):
+    _state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.pinned or not settings.DATABASE_REPLICAS:
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        ignored = model._meta.label_lower in settings.DATABASE_STICKY_IGNORE
+        if state is not None and not ignored:
+            # после записи запрос дочитывает с основной базы
+            state.wrote = state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,31 @@
+import functools
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+
+def retry_on_locked(view):
+    """Повторяет представление, если SQLite ответила «database is locked».
+
+    Ожидание занятой базы (OPTIONS timeout) не спасает, когда
+    транзакция начала с чтения и потом пытается писать: в WAL такая
+    запись сразу получает SQLITE_BUSY. Каждая попытка идёт в своей
+    транзакции, так что неудачная откатывается целиком. Попыток —
+    DATABASE_WRITE_RETRIES, пауза растёт вдвое от DATABASE_RETRY_DELAY.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        delay = settings.DATABASE_RETRY_DELAY
+        for attempt in range(settings.DATABASE_WRITE_RETRIES + 1):
+            try:
+                with transaction.atomic():
+                    return view(request, *args, **kwargs)
+            except OperationalError as exc:
+                if ('locked' not in str(exc)
+                        or attempt == settings.DATABASE_WRITE_RETRIES):
+                    raise
+            time.sleep(delay * random.uniform(0.5, 1.5))
+            delay *= 2
+    return wrapper
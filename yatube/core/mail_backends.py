@@ -0,0 +1,163 @@
+"""Отправка писем вне запроса, пачками через одно соединение.
+
+QueuedEmailBackend только кладёт письма в очередь процесса и сразу
+возвращает управление. Фоновый поток забирает из очереди всё, что
+накопилось (до EMAIL_BATCH_SIZE писем), и отправляет пачку бэкендом
+EMAIL_DELIVERY_BACKEND (по умолчанию файлы, на сайте — SMTP) через
+одно открытое соединение; соединение закрывается, если писем нет
+EMAIL_CONNECTION_IDLE секунд. Скорость ограничена EMAIL_RATE_LIMIT
+писем в секунду. Пачка, которую не удалось отправить, повторяется
+через EMAIL_RETRY_DELAY, затем вдвое дольше, всего EMAIL_SEND_ATTEMPTS
+раз. При выходе процесса очередь дописывается не дольше
+EMAIL_FLUSH_TIMEOUT секунд.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+logger = logging.getLogger(__name__)
+
+
+class Outbox:
+    """Очередь писем процесса и поток, который их отправляет."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.next_slot = 0.0
+
+    def put(self, messages):
+        for message in messages:
+            self.queue.put(message)
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='email-outbox', daemon=True
+                )
+                self.thread.start()
+
+    def take_batch(self):
+        """Ждёт первое письмо и добирает то, что уже лежит в очереди."""
+        batch = [self.queue.get(timeout=settings.EMAIL_CONNECTION_IDLE)]
+        while len(batch) < settings.EMAIL_BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def throttle(self, count):
+        rate = settings.EMAIL_RATE_LIMIT
+        if not rate:
+            return
+        now = time.monotonic()
+        if self.next_slot > now:
+            time.sleep(self.next_slot - now)
+        self.next_slot = max(now, self.next_slot) + count / rate
+
+    def run(self):
+        connection = None
+        while True:
+            try:
+                batch = self.take_batch()
+            except queue.Empty:
+                if connection is not None:
+                    connection.close()
+                    connection = None
+                continue
+            try:
+                connection = self.deliver(batch, connection)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def deliver(self, batch, connection):
+        """Отправляет пачку, повторяя с растущей паузой при ошибке.
+
+        Возвращает открытое соединение или None, если его пришлось
+        закрыть. После EMAIL_SEND_ATTEMPTS неудач пачка пишется в лог
+        и выбрасывается.
+        """
+        attempts = settings.EMAIL_SEND_ATTEMPTS
+        for attempt in range(1, attempts + 1):
+            try:
+                self.throttle(len(batch))
+                if connection is None:
+                    connection = get_connection(
+                        settings.EMAIL_DELIVERY_BACKEND
+                    )
+                    connection.open()
+                connection.send_messages(batch)
+                return connection
+            except Exception:
+                if connection is not None:
+                    connection.close()
+                    connection = None
+                if attempt == attempts:
+                    logger.exception(
+                        'Не удалось отправить %d писем за %d попыток',
+                        len(batch), attempts,
+                    )
+                    return None
+                logger.warning(
+                    'Не удалось отправить %d писем, попытка %d из %d',
+                    len(batch), attempt, attempts, exc_info=True,
+                )
+                time.sleep(settings.EMAIL_RETRY_DELAY * 2 ** (attempt - 1))
+
+    def flush(self, timeout=None):
+        """Ждёт, пока очередь опустеет; False, если не успела за timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = self.queue.all_tasks_done
+        with done:
+            while self.queue.unfinished_tasks:
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                done.wait(remaining)
+        return True
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox():
+    """Очередь текущего процесса; после fork у воркера своя."""
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None or _outbox.pid != os.getpid():
+            _outbox = Outbox()
+    return _outbox
+
+
+@atexit.register
+def flush_on_exit():
+    if _outbox is None or _outbox.pid != os.getpid():
+        return
+    if not _outbox.flush(settings.EMAIL_FLUSH_TIMEOUT):
+        logger.error(
+            'При остановке не отправлено писем: %d',
+            _outbox.queue.unfinished_tasks,
+        )
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Ставит письма в очередь процесса, не дожидаясь отправки."""
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        get_outbox().put(email_messages)
+        return len(email_messages)
@@ -0,0 +1,76 @@
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand
+
+from core.metrics import percentile
+
+DEFAULT_PATHS = ('/', '/api/v1/posts/')
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает запущенный сервер параллельными запросами и выводит '
+        'пропускную способность и задержки, например до и после смены '
+        'числа воркеров или потоков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', help='например http://127.0.0.1:8000')
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='адрес для нагрузки; можно несколько, идут по кругу',
+        )
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--warmup', type=int, default=50)
+        parser.add_argument('--label', default='', help='подпись прогона')
+        parser.add_argument('--output', help='файл для результатов JSON')
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'].rstrip('/')
+        urls = [base_url + path for path in options['paths'] or DEFAULT_PATHS]
+        local = threading.local()
+
+        def fetch(number):
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+            started = time.perf_counter()
+            try:
+                response = local.session.get(urls[number % len(urls)])
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            return time.perf_counter() - started, ok
+
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            list(pool.map(fetch, range(options['warmup'])))
+            started = time.perf_counter()
+            results = list(pool.map(fetch, range(options['requests'])))
+            elapsed = time.perf_counter() - started
+
+        timings = [duration * 1000 for duration, ok in results if ok]
+        errors = sum(not ok for _, ok in results)
+        report = {
+            'label': options['label'],
+            'urls': urls,
+            'concurrency': options['concurrency'],
+            'requests': options['requests'],
+            'errors': errors,
+            'rps': round(len(results) / elapsed, 1),
+        }
+        if timings:
+            report.update({
+                'p50_ms': round(percentile(timings, 0.5), 3),
+                'p90_ms': round(percentile(timings, 0.9), 3),
+                'p99_ms': round(percentile(timings, 0.99), 3),
+                'mean_ms': round(statistics.mean(timings), 3),
+            })
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
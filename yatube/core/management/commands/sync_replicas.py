@@ -0,0 +1,51 @@
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы копий '
+        '(DATABASE_REPLICA_FILES) целиком и атомарно.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every', type=float,
+            help='повторять раз в столько секунд',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICA_FILES:
+            self.stderr.write('Копии не настроены: задайте YATUBE_DB_REPLICAS')
+            return
+        while True:
+            started = time.perf_counter()
+            for name in settings.DATABASE_REPLICA_FILES:
+                self.copy(name)
+            self.stdout.write(
+                f'Скопировано в {len(settings.DATABASE_REPLICA_FILES)} '
+                f'файл(а) за {time.perf_counter() - started:.2f} с'
+            )
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+
+    def copy(self, name):
+        """Снимок через backup API во временный файл, затем rename."""
+        temporary = f'{name}.tmp'
+        source = sqlite3.connect(settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'])
+        target = sqlite3.connect(temporary)
+        try:
+            source.backup(target)
+            # копия открывается только на чтение: без WAL ей не нужны
+            # файлы -wal и -shm
+            target.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            target.close()
+            source.close()
+        os.replace(temporary, name)
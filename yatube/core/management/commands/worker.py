@@ -0,0 +1,86 @@
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import tasks
+
+PURGE_EVERY = 60 * 60
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи фоновой очереди (core.tasks) в пуле потоков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=settings.TASK_WORKER_THREADS
+        )
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='пауза в секундах, когда очередь пуста',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='выполнить готовые задачи и выйти',
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='показать число и время задач по функциям и выйти',
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.show_stats()
+            return
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        worker = tasks.new_worker_id()
+        threads = options['threads']
+        # один поток — задачи выполняются в основном, без пула
+        pool = None
+        if threads > 1:
+            pool = ThreadPoolExecutor(threads, thread_name_prefix='task')
+        run = pool.map if pool else map
+        purged_at = 0
+        try:
+            while not self.stopping:
+                if time.monotonic() - purged_at > PURGE_EVERY:
+                    tasks.purge_finished()
+                    purged_at = time.monotonic()
+                batch = tasks.claim(worker, threads)
+                # текущая пачка доделывается и при остановке
+                for item in run(tasks.execute, batch):
+                    self.report(item)
+                if not batch:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+        finally:
+            if pool:
+                pool.shutdown()
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def report(self, item):
+        line = (
+            f'{item.name} #{item.pk}: {item.status}, '
+            f'попытка {item.attempts}, {item.duration * 1000:.1f} мс'
+        )
+        style = (
+            self.style.SUCCESS if item.status == item.DONE
+            else self.style.ERROR
+        )
+        self.stdout.write(style(line))
+
+    def show_stats(self):
+        for row in tasks.stats():
+            self.stdout.write(
+                f'{row["name"]}: всего {row["total"]}, ждут '
+                f'{row["pending"]}, не удались {row["failed"]}, среднее '
+                f'{row["avg_ms"] or 0:.1f} мс, максимум '
+                f'{row["max_ms"] or 0:.1f} мс'
+            )
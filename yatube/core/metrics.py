@@ -0,0 +1,121 @@
+"""Стоимость запросов по представлениям.
+
+RequestMetricsMiddleware заводит на время запроса объект RequestStats;
+обёртка выполнения SQL, кеш-бэкенды из core.cache_backends и шаблонный
+бэкенд core.template_backends добавляют в него свои замеры. Итоги
+копятся в registry по имени представления (resolver_match.view_name)
+отдельно в каждом процессе.
+"""
+import threading
+import time
+from contextvars import ContextVar
+
+_current = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_time = 0.0
+        self.rendering = False
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += time.perf_counter() - started
+
+
+def current():
+    """RequestStats текущего запроса или None вне выборки."""
+    return _current.get()
+
+
+def start():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def percentile(values, share):
+    """Значение из values, ниже которого доля share (0..1) всех значений."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(share * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def count_cache(hits, misses):
+    stats = _current.get()
+    if stats is not None:
+        stats.cache_hits += hits
+        stats.cache_misses += misses
+
+
+class Registry:
+    """Накопленные по представлениям суммы; потокобезопасно."""
+
+    FIELDS = (
+        'wall_time', 'db_queries', 'db_time', 'cache_hits', 'cache_misses',
+        'template_time',
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view_name, stats, wall_time):
+        values = {
+            'wall_time': wall_time,
+            'db_queries': stats.db_queries,
+            'db_time': stats.db_time,
+            'cache_hits': stats.cache_hits,
+            'cache_misses': stats.cache_misses,
+            'template_time': stats.template_time,
+        }
+        with self._lock:
+            totals = self._views.setdefault(
+                view_name, dict.fromkeys(self.FIELDS + ('count',), 0)
+            )
+            totals.setdefault('max_wall_time', 0)
+            totals['count'] += 1
+            totals['max_wall_time'] = max(totals['max_wall_time'], wall_time)
+            for name, value in values.items():
+                totals[name] += value
+
+    def snapshot(self):
+        """Средние на запрос: время в миллисекундах."""
+        with self._lock:
+            views = {
+                name: dict(totals) for name, totals in self._views.items()
+            }
+        result = {}
+        for name, totals in sorted(views.items()):
+            count = totals['count']
+            result[name] = {
+                'count': count,
+                'wall_ms': round(totals['wall_time'] / count * 1000, 3),
+                'max_wall_ms': round(totals['max_wall_time'] * 1000, 3),
+                'db_queries': round(totals['db_queries'] / count, 2),
+                'db_ms': round(totals['db_time'] / count * 1000, 3),
+                'template_ms': round(
+                    totals['template_time'] / count * 1000, 3
+                ),
+                'cache_hits': totals['cache_hits'],
+                'cache_misses': totals['cache_misses'],
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = Registry()
@@ -0,0 +1,112 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import db_routers, metrics
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class RequestMetricsMiddleware:
+    """Замеряет время, SQL, кеш и шаблоны каждого запроса из выборки.
+
+    Доля запросов задаётся METRICS_SAMPLE_RATE. Итог уходит в
+    core.metrics.registry и в лог core.middleware, а в заголовок
+    Server-Timing — только при DEBUG или для сотрудников: посторонним
+    незачем видеть, сколько SQL и кеша стоит страница.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            return self.get_response(request)
+
+        stats, token = metrics.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(stats.execute_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.stop(token)
+        wall_time = time.perf_counter() - started
+
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        metrics.registry.record(view_name, stats, wall_time)
+        if self.show_timing(request):
+            response['Server-Timing'] = self.server_timing(stats, wall_time)
+        logger.debug(
+            '%s: %.1f мс, SQL %d за %.1f мс, шаблоны %.1f мс, '
+            'кеш %d/%d', view_name, wall_time * 1000, stats.db_queries,
+            stats.db_time * 1000, stats.template_time * 1000,
+            stats.cache_hits, stats.cache_misses,
+        )
+        return response
+
+    def show_timing(self, request):
+        if settings.DEBUG:
+            return True
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_staff
+
+    def server_timing(self, stats, wall_time):
+        return ', '.join((
+            f'app;dur={wall_time * 1000:.1f}',
+            f'db;dur={stats.db_time * 1000:.1f};'
+            f'desc="{stats.db_queries} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+            f'cache;desc="hit {stats.cache_hits}, '
+            f'miss {stats.cache_misses}"',
+        ))
+
+
+class ReplicaMiddleware:
+    """Выбирает для чтения основную базу или копию (core.db_routers).
+
+    Запросы POST и запросы сессии, которая недавно писала (есть cookie
+    DATABASE_STICKY_COOKIE), читают с основной базы: копия могла ещё
+    не получить их изменения. Cookie живёт DATABASE_STICKY_SECONDS и
+    ставится после записи в POST-запросе или в запросе вошедшего
+    пользователя. Гость, чей GET лишь поставил задачу в очередь, её
+    не получает, как и запись моделей из DATABASE_STICKY_IGNORE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = (
+            request.method not in SAFE_METHODS
+            or settings.DATABASE_STICKY_COOKIE in request.COOKIES
+        )
+        state, token = db_routers.start(pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            db_routers.stop(token)
+        if (state.wrote and settings.DATABASE_REPLICAS
+                and self.by_writer(request)):
+            response.set_cookie(
+                settings.DATABASE_STICKY_COOKIE, '1',
+                max_age=settings.DATABASE_STICKY_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def by_writer(self, request):
+        if request.method not in SAFE_METHODS:
+            return True
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_authenticated
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-17 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedSession',
+            fields=[
+                ('sid', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='Идентификатор')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Истекает')),
+            ],
+            options={
+                'verbose_name': 'Отозванная сессия',
+                'verbose_name_plural': 'Отозванные сессии',
+            },
+        ),
+    ]
@@ -9,3 +9,68 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Task(models.Model):
+    """Задача фоновой очереди, см. core.tasks."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'ждёт'),
+        (RUNNING, 'выполняется'),
+        (DONE, 'выполнена'),
+        (FAILED, 'не удалась'),
+    )
+
+    name = models.CharField('Функция', max_length=200)
+    # аргументы в JSON: {"args": [...], "kwargs": {...}}
+    arguments = models.TextField('Аргументы', default='{}')
+    key = models.CharField(
+        'Ключ идемпотентности', max_length=200,
+        unique=True, null=True, blank=True
+    )
+    status = models.CharField(
+        'Состояние', max_length=10, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField('Выполнить не раньше')
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+    started_at = models.DateTimeField('Начата', null=True, blank=True)
+    finished_at = models.DateTimeField('Закончена', null=True, blank=True)
+    # длительность последней попытки в секундах
+    duration = models.FloatField('Длительность', null=True, blank=True)
+    worker = models.CharField(max_length=64, blank=True, default='')
+    last_error = models.TextField('Последняя ошибка', blank=True, default='')
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at'], name='task_status_run_at_idx'
+            ),
+        ]
+
+
+class RevokedSession(models.Model):
+    """Отозванный идентификатор сессии в cookie, см. core.session_backends.
+
+    Хранится в базе, а не в кеше: очистка или вытеснение кеша вернули
+    бы силу скопированной cookie вышедшего пользователя.
+    """
+    sid = models.CharField('Идентификатор', max_length=32, primary_key=True)
+    # после этого срока cookie истекает сама и запись не нужна
+    expires_at = models.DateTimeField('Истекает', db_index=True)
+
+    def __str__(self):
+        return self.sid
+
+    class Meta:
+        verbose_name = 'Отозванная сессия'
+        verbose_name_plural = 'Отозванные сессии'
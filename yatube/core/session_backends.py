@@ -0,0 +1,65 @@
+"""Сессии в подписанной cookie с отзывом через базу.
+
+Данные сессии хранятся в самой cookie (как у signed_cookies), так что
+чтение сессии не обращается к таблице сессий. Чтобы выход из аккаунта
+отзывал и скопированные cookie, у сессии есть случайный идентификатор:
+при выходе он записывается в таблицу RevokedSession до истечения
+SESSION_COOKIE_AGE, и cookie с ним больше не принимается. Проверка —
+один поиск по первичному ключу и только для cookie с идентификатором.
+Таблица, а не кеш: запись не пропадёт при вытеснении или очистке кеша
+и видна всем процессам. Истёкшие записи удаляет manage.py clearsessions.
+
+Идентификатор меняется при входе (cycle_key), поэтому старая анонимная
+cookie не становится входом.
+
+Используется как SESSION_ENGINE = 'core.session_backends'.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.backends import signed_cookies
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from .models import RevokedSession
+
+SID_KEY = '_sid'
+
+
+def revoked():
+    # копия базы может отстать: отзыв читается с основной
+    return RevokedSession.objects.using(DEFAULT_DB_ALIAS)
+
+
+class SessionStore(signed_cookies.SessionStore):
+    def load(self):
+        data = super().load()
+        sid = data.get(SID_KEY)
+        if sid and revoked().filter(sid=sid).exists():
+            self.create()
+            return {}
+        return data
+
+    def save(self, must_create=False):
+        self._session.setdefault(SID_KEY, get_random_string(32))
+        super().save(must_create)
+
+    def cycle_key(self):
+        self._session[SID_KEY] = get_random_string(32)
+        super().cycle_key()
+
+    def flush(self):
+        sid = self._session.get(SID_KEY)
+        if sid:
+            expires_at = timezone.now() + timedelta(
+                seconds=settings.SESSION_COOKIE_AGE
+            )
+            revoked().update_or_create(
+                sid=sid, defaults={'expires_at': expires_at}
+            )
+        super().flush()
+
+    @classmethod
+    def clear_expired(cls):
+        revoked().filter(expires_at__lt=timezone.now()).delete()
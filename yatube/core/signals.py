@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth_backends import user_cache_key
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Ставит SQLITE_PRAGMAS каждому новому соединению с SQLite.
+
+    Копиям только для чтения достаются лишь SQLITE_READONLY_PRAGMAS:
+    журнал и синхронизация записи им не нужны.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = settings.SQLITE_PRAGMAS
+    if connection.alias in settings.DATABASE_REPLICAS:
+        pragmas = {
+            name: value for name, value in pragmas.items()
+            if name in settings.SQLITE_READONLY_PRAGMAS
+        }
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver((post_save, post_delete), sender=settings.AUTH_USER_MODEL)
+def forget_cached_user(sender, instance, **kwargs):
+    """Сбрасывает пользователя из кеша core.auth_backends."""
+    cache.delete(user_cache_key(instance.pk))
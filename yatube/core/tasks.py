@@ -0,0 +1,161 @@
+"""Фоновая очередь задач в базе проекта.
+
+Функция, объявленная через @task, ставится в очередь вызовом delay():
+строка Task записывается в текущей транзакции, поэтому задача видна
+воркеру (manage.py worker) только вместе с изменениями, которые её
+породили, и пропадает, если транзакция откатилась. Задача с тем же
+idempotency_key ставится один раз, пока прежняя не закончилась
+неудачей.
+
+Воркер забирает пачку готовых задач, выполняет их в пуле потоков,
+записывает длительность каждой попытки, а упавшие повторяет с растущей
+паузой, пока не кончатся попытки.
+"""
+import functools
+import json
+import logging
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Avg, Count, F, Max, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+
+class TaskFunction:
+    def __init__(self, func, max_attempts):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, idempotency_key=None, countdown=0, **kwargs):
+        """Ставит вызов в очередь; countdown — отсрочка в секундах.
+
+        Задача с тем же ключом, которая ждёт, выполняется или выполнена,
+        второй раз не ставится. Не удавшаяся задача с этим ключом
+        ставится заново с полным числом попыток.
+        """
+        fields = {
+            'name': self.name,
+            'arguments': json.dumps({'args': args, 'kwargs': kwargs}),
+            'max_attempts': self.max_attempts,
+            'run_at': timezone.now() + timedelta(seconds=countdown),
+        }
+        if idempotency_key is not None and Task.objects.filter(
+            key=idempotency_key, status=Task.FAILED
+        ).update(
+            status=Task.PENDING, attempts=0, worker='', started_at=None,
+            finished_at=None, **fields
+        ):
+            return
+        Task.objects.bulk_create(
+            [Task(key=idempotency_key, **fields)], ignore_conflicts=True
+        )
+
+
+def task(func=None, *, max_attempts=None):
+    """Объявляет функцию задачей очереди: добавляет ей delay()."""
+    def decorator(func):
+        return TaskFunction(
+            func, max_attempts or settings.TASK_MAX_ATTEMPTS
+        )
+    return decorator(func) if func else decorator
+
+
+def claim(worker, limit):
+    """Помечает до limit готовых задач как взятые worker и возвращает их."""
+    now = timezone.now()
+    # задачи упавшего воркера возвращаются в очередь
+    Task.objects.filter(
+        status=Task.RUNNING,
+        started_at__lt=now - timedelta(seconds=settings.TASK_STALE_AFTER),
+    ).update(status=Task.PENDING, worker='')
+    ids = list(
+        Task.objects.filter(status=Task.PENDING, run_at__lte=now)
+        .order_by('run_at', 'pk').values_list('pk', flat=True)[:limit]
+    )
+    if not ids:
+        return []
+    Task.objects.filter(pk__in=ids, status=Task.PENDING).update(
+        status=Task.RUNNING, worker=worker, started_at=now,
+        attempts=F('attempts') + 1,
+    )
+    return list(Task.objects.filter(
+        pk__in=ids, status=Task.RUNNING, worker=worker
+    ))
+
+
+def execute(item):
+    """Выполняет взятую задачу и записывает результат попытки."""
+    started = time.perf_counter()
+    try:
+        arguments = json.loads(item.arguments)
+        import_string(item.name)(*arguments['args'], **arguments['kwargs'])
+    except Exception:
+        item.duration = time.perf_counter() - started
+        item.last_error = traceback.format_exc()
+        if item.attempts < item.max_attempts:
+            item.status = Task.PENDING
+            item.run_at = timezone.now() + timedelta(
+                seconds=settings.TASK_RETRY_DELAY * 2 ** (item.attempts - 1)
+            )
+        else:
+            item.status = Task.FAILED
+            item.finished_at = timezone.now()
+        logger.warning(
+            'Задача %s #%s, попытка %s из %s: ошибка', item.name, item.pk,
+            item.attempts, item.max_attempts, exc_info=True,
+        )
+    else:
+        item.duration = time.perf_counter() - started
+        item.status = Task.DONE
+        item.finished_at = timezone.now()
+        logger.info(
+            'Задача %s #%s выполнена за %.1f мс',
+            item.name, item.pk, item.duration * 1000,
+        )
+    finally:
+        item.worker = ''
+        item.save(update_fields=(
+            'status', 'run_at', 'finished_at', 'duration', 'worker',
+            'last_error',
+        ))
+        close_old_connections()
+    return item
+
+
+def new_worker_id():
+    return uuid.uuid4().hex
+
+
+def purge_finished():
+    """Удаляет выполненные задачи старше TASK_KEEP_DONE_DAYS."""
+    border = timezone.now() - timedelta(days=settings.TASK_KEEP_DONE_DAYS)
+    return Task.objects.filter(
+        status=Task.DONE, finished_at__lt=border
+    ).delete()[0]
+
+
+def stats():
+    """Число задач по состояниям и время выполнения по функциям."""
+    return list(
+        Task.objects.values('name').annotate(
+            total=Count('pk'),
+            pending=Count('pk', filter=Q(status=Task.PENDING)),
+            failed=Count('pk', filter=Q(status=Task.FAILED)),
+            avg_ms=Avg('duration') * 1000,
+            max_ms=Max('duration') * 1000,
+        ).order_by('name')
+    )
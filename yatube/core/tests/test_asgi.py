@@ -0,0 +1,13 @@
+import importlib
+import importlib.util
+from unittest import skipUnless
+
+from django.test import SimpleTestCase
+
+
+@skipUnless(importlib.util.find_spec('asgiref'), 'asgiref не установлен')
+class AsgiEntryPointTests(SimpleTestCase):
+    def test_application_imports(self):
+        """yatube.asgi собирается из WSGI-приложения без ошибок."""
+        module = importlib.import_module('yatube.asgi')
+        self.assertTrue(callable(module.application))
@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from ..cache_backends import SQLiteCache, TieredCache
+
+
+class CacheFileMixin:
+    """Файл кеша во временной папке, которая удаляется после класса."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_dir = tempfile.mkdtemp()
+        cls.cache_file = os.path.join(cls.cache_dir, 'cache.sqlite3')
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.cache_dir, ignore_errors=True)
+
+
+class SQLiteCacheTests(CacheFileMixin, SimpleTestCase):
+    def setUp(self):
+        self.cache = SQLiteCache(self.cache_file, {})
+        self.cache.clear()
+
+    def test_set_get_delete(self):
+        """Значения переживают сериализацию и удаляются."""
+        self.cache.set('ключ', {'a': [1, 2]})
+        self.cache.set_many({'x': 1, 'y': 2})
+        self.assertEqual(self.cache.get('ключ'), {'a': [1, 2]})
+        self.assertEqual(
+            self.cache.get_many(['x', 'y', 'z']), {'x': 1, 'y': 2}
+        )
+        self.cache.delete_many(['x', 'ключ'])
+        self.assertIsNone(self.cache.get('ключ'))
+        self.assertEqual(self.cache.get('y'), 2)
+
+    def test_visible_to_other_instance(self):
+        """Второй экземпляр (другой процесс) видит те же записи."""
+        self.cache.set('общий', 'да')
+        other = SQLiteCache(self.cache_file, {})
+        self.assertEqual(other.get('общий'), 'да')
+        other.delete('общий')
+        self.assertIsNone(self.cache.get('общий'))
+
+    def test_add_and_expiry(self):
+        """add не перезаписывает живую запись, но занимает истёкшую."""
+        self.assertTrue(self.cache.add('lock', 1, 60))
+        self.assertFalse(self.cache.add('lock', 2, 60))
+        self.cache.set('old', 1, 0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get('old'))
+        self.assertTrue(self.cache.add('old', 2, 60))
+        self.assertEqual(self.cache.get('old'), 2)
+
+    def test_incr(self):
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+
+class TieredCacheTests(CacheFileMixin, SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.caches_override = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            },
+            'shared': {
+                'BACKEND': 'core.cache_backends.SQLiteCache',
+                'LOCATION': cls.cache_file,
+            },
+        })
+        cls.caches_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.caches_override.disable()
+        super().tearDownClass()
+
+    def make_cache(self, worker):
+        """L1 у LocMemCache общий для одинаковых LOCATION."""
+        return TieredCache(f'test-{worker}', {'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_TIMEOUT': 60,
+            'LOCAL_BYPASS': ['live:'],
+        }})
+
+    def setUp(self):
+        caches['shared'].clear()
+        self.worker = self.make_cache(1)
+        self.other_worker = self.make_cache(2)
+        self.worker.clear()
+        self.other_worker.clear()
+
+    def test_reads_through_shared(self):
+        """Значение, записанное одним процессом, читает другой."""
+        self.worker.set('post', 'html')
+        self.assertEqual(self.other_worker.get('post'), 'html')
+        self.assertEqual(caches['shared'].get('post'), 'html')
+
+    def test_local_copy(self):
+        """Прочитанное значение отдаётся из L1 до истечения его срока."""
+        self.worker.set('post', 'html')
+        self.other_worker.get('post')
+        caches['shared'].delete('post')
+        self.assertEqual(self.other_worker.get('post'), 'html')
+        self.assertIsNone(self.make_cache(3).get('post'))
+
+    def test_bypass_prefix(self):
+        """Ключи из LOCAL_BYPASS всегда читаются из общего кеша."""
+        self.worker.set('live:token', 'a')
+        self.other_worker.get('live:token')
+        self.worker.set('live:token', 'b')
+        self.assertEqual(self.other_worker.get('live:token'), 'b')
+
+    def test_add_is_shared(self):
+        """Блокировку через add может взять только один процесс."""
+        self.assertTrue(self.worker.add('lock', 1))
+        self.assertFalse(self.other_worker.add('lock', 1))
+        self.worker.delete('lock')
+        self.assertTrue(self.other_worker.add('lock', 1))
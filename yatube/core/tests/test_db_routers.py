@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.urls import reverse
+
+from .. import db_routers
+from ..models import Task
+from ..db_routers import PrimaryReplicaRouter
+from ..middleware import ReplicaMiddleware
+
+User = get_user_model()
+COOKIE = settings.DATABASE_STICKY_COOKIE
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def route(self, pinned):
+        state, token = db_routers.start(pinned)
+        self.addCleanup(db_routers.stop, token)
+        return state
+
+    def test_reads_outside_request_use_primary(self):
+        """Без middleware чтение идёт с основной базы."""
+        self.assertEqual(self.router.db_for_read(User), DEFAULT_DB_ALIAS)
+
+    def test_reads_use_replica_until_write(self):
+        """Чтение уходит на копию, после записи — на основную базу."""
+        state = self.route(pinned=False)
+        self.assertEqual(self.router.db_for_read(User), 'replica1')
+        self.assertEqual(self.router.db_for_write(User), DEFAULT_DB_ALIAS)
+        self.assertTrue(state.wrote)
+        self.assertEqual(self.router.db_for_read(User), DEFAULT_DB_ALIAS)
+
+    def test_background_writes_do_not_pin(self):
+        """Запись служебных моделей не переводит чтение на основную базу."""
+        state = self.route(pinned=False)
+        self.router.db_for_write(Task)
+        self.assertFalse(state.wrote)
+        self.assertEqual(self.router.db_for_read(User), 'replica1')
+
+    def test_migrations_only_on_primary(self):
+        self.assertTrue(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'posts'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+
+
+# копия в тестах — сама основная база: проверяется только cookie
+@override_settings(DATABASE_REPLICAS=[DEFAULT_DB_ALIAS])
+class ReplicaMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('writer')
+        self.client.force_login(self.user)
+
+    def test_write_sets_sticky_cookie(self):
+        """После создания поста сессия закрепляется за основной базой."""
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        cookie = response.cookies[COOKIE]
+        self.assertEqual(
+            cookie['max-age'], settings.DATABASE_STICKY_SECONDS
+        )
+
+    def test_read_does_not_set_cookie(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(COOKIE, response.cookies)
+
+    def test_guest_get_write_does_not_set_cookie(self):
+        """GET гостя, который что-то записал, cookie не получает."""
+        def view(request):
+            request.user = AnonymousUser()
+            User.objects.create_user('guest')
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        response = ReplicaMiddleware(view)(request)
+        self.assertNotIn(COOKIE, response.cookies)
+
+    def test_user_get_write_sets_cookie(self):
+        """Подписка по GET закрепляет сессию за основной базой."""
+        User.objects.create_user('author')
+        response = self.client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        self.assertIn(COOKIE, response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_cookie_without_replicas(self):
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        self.assertNotIn(COOKIE, response.cookies)
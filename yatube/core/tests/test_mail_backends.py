@@ -0,0 +1,118 @@
+import time
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import SimpleTestCase, override_settings
+
+from .. import mail_backends
+from ..mail_backends import get_outbox
+
+QUEUED = 'core.mail_backends.QueuedEmailBackend'
+COUNTING = 'core.tests.test_mail_backends.CountingBackend'
+FLAKY = 'core.tests.test_mail_backends.FlakyBackend'
+
+
+class CountingBackend(EmailBackend):
+    """locmem-бэкенд, который считает открытия и пачки."""
+
+    opened = 0
+    batches = []
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+    def send_messages(self, messages):
+        CountingBackend.batches.append(len(messages))
+        return super().send_messages(messages)
+
+
+class FlakyBackend(CountingBackend):
+    """Падает на первых failures отправках."""
+
+    failures = 0
+
+    def send_messages(self, messages):
+        if FlakyBackend.failures:
+            FlakyBackend.failures -= 1
+            raise ConnectionError('сервер недоступен')
+        return super().send_messages(messages)
+
+
+def send(count):
+    return mail.send_mass_mail(
+        [(f'Тема {i}', 'Текст', 'from@yatube.ru', ['to@yatube.ru'])
+         for i in range(count)]
+    )
+
+
+@override_settings(
+    EMAIL_BACKEND=QUEUED, EMAIL_DELIVERY_BACKEND=COUNTING,
+    EMAIL_RATE_LIMIT=0,
+)
+class QueuedEmailBackendTests(SimpleTestCase):
+    def setUp(self):
+        mail.outbox = []
+        CountingBackend.opened = 0
+        CountingBackend.batches = []
+        # своя очередь: соединение прежнего теста может быть ещё открыто
+        mail_backends._outbox = None
+
+    def test_sent_after_flush(self):
+        """Письмо уходит из фонового потока, flush дожидается отправки."""
+        self.assertEqual(
+            mail.send_mail('Тема', 'Текст', 'from@yatube.ru',
+                           ['to@yatube.ru']),
+            1,
+        )
+        self.assertTrue(get_outbox().flush(5))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Тема')
+
+    def test_batch_over_one_connection(self):
+        """Письма одного вызова уходят одной пачкой через одно соединение."""
+        self.assertEqual(send(5), 5)
+        self.assertTrue(get_outbox().flush(5))
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(CountingBackend.batches, [5])
+
+    @override_settings(EMAIL_BATCH_SIZE=2)
+    def test_batch_size(self):
+        send(5)
+        self.assertTrue(get_outbox().flush(5))
+        self.assertEqual(CountingBackend.batches, [2, 2, 1])
+
+    @override_settings(
+        EMAIL_DELIVERY_BACKEND=FLAKY, EMAIL_SEND_ATTEMPTS=3,
+        EMAIL_RETRY_DELAY=0,
+    )
+    def test_failed_batch_is_retried(self):
+        """Пачка после ошибки отправляется заново по новому соединению."""
+        FlakyBackend.failures = 2
+        with self.assertLogs('core.mail_backends', 'WARNING'):
+            send(3)
+            self.assertTrue(get_outbox().flush(5))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(CountingBackend.opened, 3)
+
+    @override_settings(
+        EMAIL_DELIVERY_BACKEND=FLAKY, EMAIL_SEND_ATTEMPTS=2,
+        EMAIL_RETRY_DELAY=0,
+    )
+    def test_attempts_are_capped(self):
+        FlakyBackend.failures = 5
+        with self.assertLogs('core.mail_backends', 'ERROR'):
+            send(1)
+            self.assertTrue(get_outbox().flush(5))
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(FlakyBackend.failures, 3)
+
+    @override_settings(EMAIL_BATCH_SIZE=1, EMAIL_RATE_LIMIT=50)
+    def test_rate_limit(self):
+        """Пять писем при 50 в секунду уходят не быстрее чем за 0.08 с."""
+        get_outbox().next_slot = 0.0
+        started = time.monotonic()
+        send(5)
+        self.assertTrue(get_outbox().flush(5))
+        self.assertGreaterEqual(time.monotonic() - started, 0.08)
+        self.assertEqual(len(mail.outbox), 5)
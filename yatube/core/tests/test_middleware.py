@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..metrics import registry
+
+User = get_user_model()
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'core.cache_backends.CountingLocMemCache',
+        'LOCATION': 'test-metrics',
+    },
+})
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        caches['default'].clear()
+
+    def test_server_timing_header(self):
+        """Сотруднику Server-Timing отдаёт время, SQL, шаблоны и кеш."""
+        staff = User.objects.create_user('staff', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for metric in ('app;dur=', 'db;dur=', 'tpl;dur=', 'cache;desc='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, timing)
+
+    def test_server_timing_hidden_from_readers(self):
+        """Читателю заголовок не отдаётся, но замер попадает в сводку."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(registry.snapshot()['posts:index']['count'], 1)
+        with self.settings(DEBUG=True):
+            response = self.client.get(reverse('posts:index'))
+        self.assertIn('app;dur=', response['Server-Timing'])
+
+    def test_aggregated_by_view_name(self):
+        """Замеры копятся по имени представления, кеш учитывается."""
+        url = reverse('about:author')
+        self.client.get(url)
+        self.client.get(url)
+        views = registry.snapshot()
+        self.assertEqual(views['about:author']['count'], 2)
+        self.assertGreater(views['about:author']['template_ms'], 0)
+        self.client.get(reverse('posts:index'))
+        index = registry.snapshot()['posts:index']
+        self.assertGreater(index['cache_misses'], 0)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_sample_rate_zero(self):
+        """Запросы вне выборки не замеряются."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(registry.snapshot(), {})
+
+    def test_metrics_endpoint_for_staff(self):
+        """Сводку видят только сотрудники."""
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        staff = User.objects.create_user('staff', is_staff=True)
+        client = Client()
+        client.force_login(staff)
+        client.get(reverse('posts:index'))
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('posts:index', response.json()['views'])
@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import db_routers
+from ..auth_backends import CachedModelBackend, user_cache_key
+from ..session_backends import SID_KEY
+
+User = get_user_model()
+COOKIE = settings.SESSION_COOKIE_NAME
+
+
+@override_settings(SESSION_ENGINE='core.session_backends')
+class HybridSessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', password='old-secret-42'
+        )
+        self.client.login(username='reader', password='old-secret-42')
+
+    def page(self, client=None):
+        return (client or self.client).get(reverse('about:author'))
+
+    def test_no_session_or_user_queries(self):
+        """Запрос с входом не читает ни сессию, ни пользователя из базы."""
+        self.page()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.page()
+        self.assertEqual(response.wsgi_request.user, self.user)
+        tables = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('django_session', tables)
+        self.assertNotIn('auth_user', tables)
+
+    def test_logout_revokes_copied_cookie(self):
+        copied = self.client.cookies[COOKIE].value
+        self.client.get(reverse('users:logout'))
+        thief = Client()
+        thief.cookies[COOKIE] = copied
+        self.assertTrue(self.page(thief).wsgi_request.user.is_anonymous)
+
+    def test_revocation_survives_cache_clear(self):
+        """Отзыв хранится в базе: очистка кеша не возвращает cookie силу."""
+        copied = self.client.cookies[COOKIE].value
+        self.client.get(reverse('users:logout'))
+        cache.clear()
+        thief = Client()
+        thief.cookies[COOKIE] = copied
+        self.assertTrue(self.page(thief).wsgi_request.user.is_anonymous)
+
+    def test_password_hash_not_cached(self):
+        """В кеше нет хеша пароля, а пользователь из кеша его не теряет."""
+        self.page()
+        entry = cache.get(user_cache_key(self.user.pk))
+        self.assertNotIn(self.user.password, repr(entry))
+        user = self.page().wsgi_request.user
+        self.assertEqual(user, self.user)
+        user.first_name = 'Имя'
+        user.save()
+        self.assertTrue(self.client.login(
+            username='reader', password='old-secret-42'
+        ))
+
+    def test_login_changes_session_id(self):
+        anonymous = Client()
+        anonymous.get(reverse('users:login'))
+        session = anonymous.session
+        sid = session[SID_KEY]
+        anonymous.post(reverse('users:login'), {
+            'username': 'reader', 'password': 'old-secret-42',
+        })
+        self.assertNotEqual(anonymous.session[SID_KEY], sid)
+
+    def test_password_change_logs_out_other_sessions(self):
+        """После смены пароля другие сессии выходят, текущая — нет."""
+        other = Client()
+        other.login(username='reader', password='old-secret-42')
+        self.page(other)
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+        self.client.post(reverse('users:password_change_form'), {
+            'old_password': 'old-secret-42',
+            'new_password1': 'new-secret-42',
+            'new_password2': 'new-secret-42',
+        })
+        self.assertTrue(self.page(other).wsgi_request.user.is_anonymous)
+        self.assertEqual(self.page().wsgi_request.user, self.user)
+
+    def test_inactive_user_rejected(self):
+        self.page()
+        self.user.is_active = False
+        self.user.save()
+        self.assertTrue(self.page().wsgi_request.user.is_anonymous)
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_user_loaded_from_primary(self):
+        """Промах кеша читает пользователя с основной базы, не с копии.
+
+        Копии replica1 в тестах нет: чтение через маршрутизатор упало
+        бы, а отставшая копия вернула бы прежний хеш пароля.
+        """
+        _, token = db_routers.start(pinned=False)
+        self.addCleanup(db_routers.stop, token)
+        user = CachedModelBackend().get_user(self.user.pk)
+        self.assertEqual(user, self.user)
+        self.assertEqual(
+            user.get_session_auth_hash(), self.user.get_session_auth_hash()
+        )
@@ -0,0 +1,50 @@
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test import override_settings
+
+from ..decorators import retry_on_locked
+
+
+class SQLitePragmaTests(TestCase):
+    def test_pragmas_applied(self):
+        """Соединение получает настройки из SQLITE_PRAGMAS."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -64 * 1024)
+
+
+@override_settings(DATABASE_RETRY_DELAY=0)
+class RetryOnLockedTests(SimpleTestCase):
+    databases = {'default'}
+
+    def make_view(self, errors):
+        calls = []
+
+        @retry_on_locked
+        def view(request):
+            calls.append(request)
+            if len(calls) <= len(errors):
+                raise OperationalError(errors[len(calls) - 1])
+            return HttpResponse('ok')
+        return view, calls
+
+    def test_retries_locked_database(self):
+        view, calls = self.make_view(['database is locked'] * 2)
+        response = view(RequestFactory().post('/'))
+        self.assertEqual(response.content, b'ok')
+        self.assertEqual(len(calls), 3)
+
+    def test_gives_up_after_retries(self):
+        view, calls = self.make_view(['database is locked'] * 10)
+        with self.assertRaises(OperationalError):
+            view(RequestFactory().post('/'))
+        self.assertEqual(len(calls), 4)
+
+    def test_other_errors_not_retried(self):
+        view, calls = self.make_view(['no such table: posts_post'])
+        with self.assertRaises(OperationalError):
+            view(RequestFactory().post('/'))
+        self.assertEqual(len(calls), 1)
@@ -0,0 +1,98 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Task
+from ..tasks import task
+
+calls = []
+
+
+@task
+def record(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def broken():
+    raise RuntimeError('сломалась')
+
+
+def run_worker():
+    call_command('worker', once=True, threads=1, stdout=StringIO())
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_and_run(self):
+        """Задача выполняется воркером, время попытки записывается."""
+        record.delay('значение')
+        self.assertEqual(calls, [])
+        run_worker()
+        self.assertEqual(calls, ['значение'])
+        item = Task.objects.get()
+        self.assertEqual(item.status, Task.DONE)
+        self.assertEqual(item.attempts, 1)
+        self.assertIsNotNone(item.duration)
+
+    def test_idempotency_key(self):
+        record.delay(1, idempotency_key='once')
+        record.delay(2, idempotency_key='once')
+        run_worker()
+        self.assertEqual(calls, [1])
+
+    def test_failed_key_is_enqueued_again(self):
+        """Неудача не запирает ключ: задача ставится заново."""
+        Task.objects.create(
+            name=record.name, key='once', status=Task.FAILED, attempts=3,
+            run_at=timezone.now(), finished_at=timezone.now(),
+        )
+        record.delay(2, idempotency_key='once')
+        item = Task.objects.get()
+        self.assertEqual((item.status, item.attempts), (Task.PENDING, 0))
+        run_worker()
+        self.assertEqual(calls, [2])
+
+    def test_rolled_back_with_transaction(self):
+        """Задача не переживает откат транзакции, которая её поставила."""
+        with transaction.atomic():
+            record.delay(1)
+            transaction.set_rollback(True)
+        self.assertFalse(Task.objects.exists())
+
+    def test_countdown(self):
+        record.delay(1, countdown=60)
+        run_worker()
+        self.assertEqual(calls, [])
+
+    def test_retries_then_fails(self):
+        """Упавшая задача повторяется позже, затем помечается неудачной."""
+        broken.delay()
+        with self.assertLogs('core.tasks', 'WARNING'):
+            run_worker()
+        item = Task.objects.get()
+        self.assertEqual(item.status, Task.PENDING)
+        self.assertGreater(item.run_at, timezone.now())
+        self.assertIn('сломалась', item.last_error)
+        Task.objects.update(run_at=timezone.now() - timedelta(seconds=1))
+        with self.assertLogs('core.tasks', 'WARNING'):
+            run_worker()
+        item.refresh_from_db()
+        self.assertEqual(item.status, Task.FAILED)
+        self.assertEqual(item.attempts, 2)
+
+    def test_stale_task_is_reclaimed(self):
+        """Задачу упавшего воркера берёт другой."""
+        record.delay(1)
+        Task.objects.update(
+            status=Task.RUNNING, worker='dead',
+            started_at=timezone.now() - timedelta(days=1),
+        )
+        run_worker()
+        self.assertEqual(calls, [1])
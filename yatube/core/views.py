@@ -1,5 +1,11 @@
+import os
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from .metrics import registry
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +21,12 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+@staff_member_required
+def metrics(request):
+    """Средние замеры RequestMetricsMiddleware по представлениям."""
+    return JsonResponse(
+        {'pid': os.getpid(), 'views': registry.snapshot()},
+        json_dumps_params={'ensure_ascii': False},
+    )
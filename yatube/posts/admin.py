@@ -1,6 +1,80 @@
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
 
 from .models import Post, Group, Follow
+from .search import get_backend
+
+GROUP_CHOICES_KEY = 'admin:group_choices'
+
+
+def estimated_count(model):
+    """Примерное число строк таблицы без полного COUNT(*).
+
+    Берётся из статистики ANALYZE, если она есть, иначе для SQLite —
+    наибольший id (удалённые строки завышают оценку).
+    """
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [table]
+            )
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            )
+            if cursor.fetchone():
+                cursor.execute(
+                    'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                    [table]
+                )
+                row = cursor.fetchone()
+                if row:
+                    return int(row[0].split()[0])
+            cursor.execute(f'SELECT MAX(rowid) FROM {table}')
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор списка в админке для больших таблиц.
+
+    Без фильтров число записей оценивается по статистике таблицы,
+    с фильтрами считается не дальше ADMIN_EXACT_COUNT_LIMIT строк.
+    """
+
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model)
+            if estimate is not None and estimate > limit:
+                return estimate
+        return queryset[:limit].count()
+
+
+def group_choices():
+    """Варианты групп для list_editable; сбрасываются сигналами Group."""
+    choices = cache.get(GROUP_CHOICES_KEY)
+    if choices is None:
+        choices = [('', '---------')] + list(
+            Group.objects.order_by('title').values_list('pk', 'title')
+        )
+        cache.set(GROUP_CHOICES_KEY, choices, None)
+    return choices
+
+
+def forget_group_choices():
+    cache.delete(GROUP_CHOICES_KEY)
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -12,12 +86,50 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    autocomplete_fields = ('group',)
+    raw_id_fields = ('author',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        """В списке группа выбирается из закешированных вариантов.
+
+        Иначе каждая строка list_editable запрашивает все группы
+        (или, с autocomplete, свою выбранную группу) отдельно.
+        """
+        changelist = request.resolver_match.url_name.endswith('changelist')
+        if db_field.name == 'group' and changelist:
+            kwargs['widget'] = forms.Select
+            field = super().formfield_for_foreignkey(
+                db_field, request, **kwargs
+            )
+            field.choices = group_choices()
+            return field
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по полнотекстовому индексу вместо LIKE по таблице."""
+        if not search_term:
+            return queryset, False
+        return get_backend().filter(queryset, search_term), False
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('title', 'slug')
+    search_fields = ('title', 'slug')
+
+
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ('user', 'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+
 
 admin.site.register(Post, PostAdmin)
 
-admin.site.register(Group)
-admin.site.register(Follow)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Follow, FollowAdmin)
@@ -0,0 +1,62 @@
+"""Кеш отрисованных карточек постов для страниц со списками.
+
+Ключ карточки включает pk, card_version и дату поста: правка поста,
+комментарий или переименование группы увеличивают card_version, и
+старая карточка просто перестаёт запрашиваться. Страница собирается
+из кеша одним get_many, отрисовываются только недостающие карточки;
+миниатюры для них находятся заранее, все разом.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from .models import Post
+from .thumbnails import prefetch_thumbnails
+
+CARD_TEMPLATES = {
+    'index': 'posts/cards/index.html',
+    'group_list': 'posts/cards/group_list.html',
+    'profile': 'posts/cards/profile.html',
+    'follow': 'posts/cards/follow.html',
+}
+
+
+def card_key(post, variant):
+    return (
+        f'post_card:{variant}:{post.pk}:{post.card_version}:'
+        f'{post.pub_date.timestamp()}'
+    )
+
+
+def attach_cards(page_obj, variant):
+    """Записывает в post.card готовый HTML карточки каждого поста."""
+    posts = {card_key(post, variant): post for post in page_obj}
+    cached = cache.get_many(list(posts))
+    prefetch_thumbnails(
+        post for key, post in posts.items() if key not in cached
+    )
+    rendered = {}
+    for key, post in posts.items():
+        html = cached.get(key)
+        if html is None:
+            html = rendered[key] = render_to_string(
+                CARD_TEMPLATES[variant], {'post': post}
+            )
+        post.card = mark_safe(html)
+    if rendered:
+        cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+    return page_obj
+
+
+def bump_card_version(**filters):
+    """Делает устаревшими карточки постов, подходящих под filters."""
+    Post.objects.filter(**filters).update(
+        card_version=F('card_version') + 1, updated_at=timezone.now()
+    )
+
+
+def forget_cards(post):
+    cache.delete_many([card_key(post, variant) for variant in CARD_TEMPLATES])
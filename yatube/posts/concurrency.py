@@ -0,0 +1,97 @@
+"""Независимые запросы одного представления — параллельно в потоках.
+
+Асинхронных представлений в Django 2.2 нет, поэтому запросы, которые
+не зависят друг от друга (автор, проверка подписки и страница постов
+в profile), выполняются в общем пуле из VIEW_QUERY_THREADS потоков.
+У каждого потока своё соединение с базой, которое живёт CONN_MAX_AGE.
+
+Пул общий для всех запросов процесса, поэтому в очередь к нему не
+встают: функция, которой не хватило свободного потока, выполняется
+в текущем потоке, как без пула.
+
+Внутри транзакции всё выполняется по очереди в текущем потоке: другие
+соединения не видят её незафиксированных изменений.
+"""
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from core import metrics
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def _pool():
+    """Пул потоков и семафор его свободных потоков."""
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                settings.VIEW_QUERY_THREADS,
+                thread_name_prefix='view-query',
+            )
+            _slots = threading.BoundedSemaphore(settings.VIEW_QUERY_THREADS)
+    return _executor, _slots
+
+
+def _call(func, slots):
+    stats = metrics.current()
+    timed = (
+        connection.execute_wrapper(stats.execute_wrapper)
+        if stats is not None else nullcontext()
+    )
+    try:
+        with timed:
+            return func()
+    finally:
+        close_old_connections()
+        slots.release()
+
+
+def _submit(func):
+    """Future функции в пуле или None, если свободного потока нет."""
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        return None
+    return executor.submit(contextvars.copy_context().run, _call, func, slots)
+
+
+def _inline(func):
+    future = Future()
+    try:
+        future.set_result(func())
+    except Exception as error:
+        future.set_exception(error)
+    return future
+
+
+def gather(*funcs):
+    """Вызывает funcs и возвращает их результаты по порядку.
+
+    Первая функция выполняется в текущем потоке, остальные — в пуле
+    с копией контекста запроса (замеры, выбор копии базы), а если
+    свободных потоков нет — тоже в текущем, после первой. Исключение
+    любой из функций пробрасывается после того, как закончатся все.
+    """
+    if (len(funcs) < 2 or not settings.VIEW_QUERY_THREADS
+            or connection.in_atomic_block):
+        return [func() for func in funcs]
+    futures = [_submit(func) for func in funcs[1:]]
+    try:
+        first = funcs[0]()
+        futures = [
+            future or _inline(func)
+            for future, func in zip(futures, funcs[1:])
+        ]
+    finally:
+        rest = [future.exception() for future in futures if future]
+    for error in rest:
+        if error is not None:
+            raise error
+    return [first] + [future.result() for future in futures]
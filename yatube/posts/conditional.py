@@ -0,0 +1,112 @@
+"""Условные GET (ETag и Last-Modified) для страниц поста, автора и группы.
+
+Состояние страницы считается несколькими запросами по индексам, без
+отрисовки: последнее updated_at постов и комментариев страницы, их
+число, card_version поста и поля, которые показаны рядом с постами.
+Ответ 304 отдаёт django.views.decorators.http.condition.
+
+Last-Modified не должен уходить назад: иначе клиент с одним
+If-Modified-Since получит 304 на устаревшую страницу. Поэтому
+удаление поста или его перенос в другую группу сдвигает updated_at
+самого свежего из оставшихся постов автора и группы (touch_latest),
+а смена имени пользователя — постов, под которыми он комментировал.
+
+ETag учитывает пользователя: вошедшим показываются свои кнопки.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from .models import Comment, Follow, Group, Post, User
+
+
+def _latest(*dates):
+    return max((date for date in dates if date), default=None)
+
+
+def touch(**filters):
+    """Сдвигает updated_at постов под filters, не трогая карточки."""
+    Post.objects.filter(**filters).update(updated_at=timezone.now())
+
+
+def touch_latest(**filters):
+    """Сдвигает updated_at самого свежего поста под filters.
+
+    Вызывается, когда пост уходит со страницы автора или группы:
+    максимум updated_at по ним не уменьшается.
+    """
+    latest = Post.objects.filter(**filters).order_by('-updated_at')
+    touch(pk__in=latest.values('pk')[:1])
+
+
+def post_detail_state(request, post_id):
+    post = Post.objects.filter(pk=post_id).values_list(
+        'updated_at', 'card_version', 'comments_count', 'author__username',
+        'author__first_name', 'author__last_name',
+        'author__stats__posts_count', 'group__title', 'group__slug',
+    ).first()
+    if post is None:
+        return None
+    comments = Comment.objects.filter(post_id=post_id).aggregate(
+        last=Max('updated_at')
+    )
+    return _latest(post[0], comments['last']), post[1:]
+
+
+def profile_state(request, username):
+    author = User.objects.filter(username=username).values_list(
+        'pk', 'first_name', 'last_name', 'stats__posts_count',
+        'stats__followers_count', 'stats__following_count',
+    ).first()
+    if author is None:
+        return None
+    posts = Post.objects.filter(author_id=author[0]).aggregate(
+        last=Max('updated_at')
+    )
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author_id=author[0]
+    ).exists()
+    return posts['last'], author + (following,)
+
+
+def group_posts_state(request, slug):
+    group = Group.objects.filter(slug=slug).values_list(
+        'pk', 'title', 'description'
+    ).first()
+    if group is None:
+        return None
+    posts = Post.objects.filter(group_id=group[0]).aggregate(
+        last=Max('updated_at'), count=Count('pk')
+    )
+    return posts['last'], group + (posts['count'],)
+
+
+def conditional_page(state_func):
+    """Декоратор представления: ETag и Last-Modified из state_func.
+
+    state_func(request, **kwargs) возвращает пару (время последнего
+    изменения, прочие поля страницы) или None, если объекта нет —
+    тогда представление отвечает как обычно.
+    """
+    def state(request, *args, **kwargs):
+        # condition спрашивает ETag и Last-Modified по отдельности
+        if not hasattr(request, '_page_state'):
+            request._page_state = state_func(request, *args, **kwargs)
+        return request._page_state
+
+    def etag(request, *args, **kwargs):
+        page = state(request, *args, **kwargs)
+        if page is None:
+            return None
+        user = request.user.pk if request.user.is_authenticated else None
+        last_modified, fields = page
+        raw = repr((user, last_modified and last_modified.isoformat(), fields))
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        page = state(request, *args, **kwargs)
+        return page and page[0]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,72 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарным UPDATE ... SET x = x + 1 из сигналов,
+а rebuild_counters пересчитывает их целиком одним проходом.
+"""
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Post, User, UserStats
+from .utils import chunked
+
+
+def _count(model, field):
+    """Подзапрос с числом строк model, ссылающихся на внешний pk."""
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by().values(field).annotate(count=Count('pk'))
+        .values('count')
+    ), 0)
+
+
+def _user_counts(apps, queryset):
+    Post = apps.get_model('posts', 'Post')
+    Follow = apps.get_model('posts', 'Follow')
+    return queryset.annotate(
+        posts_count=_count(Post, 'author'),
+        followers_count=_count(Follow, 'author'),
+        following_count=_count(Follow, 'user'),
+    ).values('pk', 'posts_count', 'followers_count', 'following_count')
+
+
+def change_user_counter(user_id, field, delta):
+    """Сдвигает счётчик пользователя; нет строки — считает с нуля."""
+    updated = UserStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta}
+    )
+    if updated or delta < 0:
+        # при удалении строку не создаём: пользователь может удаляться
+        # целиком, а недостающая строка досчитается при следующей записи
+        return
+    for row in _user_counts(global_apps, User.objects.filter(pk=user_id)):
+        UserStats.objects.get_or_create(
+            user_id=user_id,
+            defaults={key: row[key] for key in row if key != 'pk'}
+        )
+
+
+def change_comments_counter(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F('comments_count') + delta
+    )
+
+
+def rebuild_counters(apps=global_apps):
+    """Пересчитывает все счётчики пакетами.
+
+    apps передаётся из миграции, чтобы работать с историческими моделями.
+    """
+    UserStats = apps.get_model('posts', 'UserStats')
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    User = UserStats._meta.get_field('user').related_model
+    with transaction.atomic():
+        UserStats.objects.all().delete()
+        rows = _user_counts(apps, User.objects.all()).iterator()
+        for chunk in chunked(rows):
+            UserStats.objects.bulk_create(
+                UserStats(user_id=row.pop('pk'), **row) for row in chunk
+            )
+        Post.objects.update(comments_count=_count(Comment, 'post'))
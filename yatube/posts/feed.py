@@ -0,0 +1,197 @@
+"""Лента подписок с раскладкой постов по читателям при записи.
+
+Пост обычного автора при публикации копируется в FeedItem каждого
+подписчика, и follow_index читает одну таблицу без join через Follow.
+Посты авторов, у которых подписчиков больше FEED_FANOUT_MAX_FOLLOWERS,
+не раскладываются, а подмешиваются в ленту при чтении; раскладка
+для больших аудиторий идёт в фоновой очереди (core.tasks).
+
+При подписке в ленту попадают все посты автора: последние
+FEED_BACKFILL_INLINE — сразу, остальные — задачей backfill пачками
+по BATCH_SIZE. Так же, целиком, ленты заполняются в rebuild_feeds
+и когда автор перестаёт быть тяжёлым.
+
+FeedItem хранит копию даты поста, и лента упорядочена и листается
+по (FeedItem.pub_date, FeedItem.post_id) — полям FEED_CURSOR — по
+индексу ленты читателя.
+"""
+from django.conf import settings
+from django.db.models import F, Q
+
+from core.tasks import task
+
+from .models import FeedItem, Follow, Post, UserStats
+from .utils import BATCH_SIZE, chunked
+
+# поля курсора и порядок ленты, см. follow_feed
+FEED_CURSOR = ('feed_date', 'feed_post')
+FEED_ORDERING = ('-feed_date', '-feed_post')
+
+
+def followers_count(author):
+    counts = UserStats.objects.filter(user_id=author).values_list(
+        'followers_count', flat=True
+    )
+    return next(iter(counts), 0)
+
+
+def is_heavy(author):
+    return followers_count(author) > settings.FEED_FANOUT_MAX_FOLLOWERS
+
+
+def _bulk_add(items):
+    for chunk in chunked(items):
+        FeedItem.objects.bulk_create(chunk, ignore_conflicts=True)
+
+
+def _recent_posts(author):
+    """Пары (id, дата) последних постов автора для раскладки сразу."""
+    return list(
+        Post.objects.filter(author=author)
+        .order_by('-pub_date')
+        .values_list('pk', 'pub_date')[:settings.FEED_BACKFILL_INLINE]
+    )
+
+
+def _post_chunks(author):
+    """Все посты автора пачками по BATCH_SIZE: списки пар (id, дата)."""
+    posts = Post.objects.filter(author=author).order_by('-pk').values_list(
+        'pk', 'pub_date'
+    )
+    chunk = list(posts[:BATCH_SIZE])
+    while chunk:
+        yield chunk
+        chunk = list(posts.filter(pk__lt=chunk[-1][0])[:BATCH_SIZE])
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора.
+
+    Аудиторию до FEED_FANOUT_INLINE_MAX читателей пост получает сразу,
+    большую — через задачу очереди, чтобы не задерживать публикацию.
+    """
+    followers = followers_count(post.author_id)
+    if followers > settings.FEED_FANOUT_MAX_FOLLOWERS:
+        return
+    if followers > settings.FEED_FANOUT_INLINE_MAX:
+        fan_out.delay(
+            post.pk, post.author_id, idempotency_key=f'fan_out:{post.pk}'
+        )
+    else:
+        fan_out(post.pk, post.author_id)
+
+
+@task
+def fan_out(post_id, author_id):
+    pub_date = Post.objects.filter(pk=post_id).values_list(
+        'pub_date', flat=True
+    ).first()
+    # пост могли удалить, пока задача ждала в очереди
+    if pub_date is None:
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    _bulk_add(
+        FeedItem(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for user_id in follower_ids.iterator()
+    )
+
+
+@task
+def backfill(author_id, user_ids=None):
+    """Раскладывает все посты автора по лентам его подписчиков.
+
+    user_ids ограничивает читателей; кто успел отписаться, пока задача
+    ждала в очереди, ничего не получает.
+    """
+    if is_heavy(author_id):
+        return
+    followers = Follow.objects.filter(author_id=author_id)
+    if user_ids is not None:
+        followers = followers.filter(user_id__in=user_ids)
+    follower_ids = list(followers.values_list('user_id', flat=True))
+    if not follower_ids:
+        return
+    for posts in _post_chunks(author_id):
+        _bulk_add(
+            FeedItem(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for user_id in follower_ids
+            for post_id, pub_date in posts
+        )
+
+
+def add_follow(follow):
+    """Добавляет в ленту читателя посты нового автора.
+
+    Последние FEED_BACKFILL_INLINE постов видны сразу, если их больше —
+    остальные догружает задача backfill.
+    """
+    if is_heavy(follow.author_id):
+        return
+    posts = _recent_posts(follow.author_id)
+    _bulk_add(
+        FeedItem(user_id=follow.user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in posts
+    )
+    if len(posts) >= settings.FEED_BACKFILL_INLINE:
+        backfill.delay(follow.author_id, [follow.user_id])
+
+
+def remove_follow(follow):
+    """Убирает посты автора из ленты отписавшегося читателя.
+
+    Если автор только что перестал быть «тяжёлым», его посты
+    раскладываются оставшимся подписчикам задачей backfill: пока он
+    был тяжёлым, они в ленты не попадали.
+    """
+    FeedItem.objects.filter(
+        user_id=follow.user_id, post__author_id=follow.author_id
+    ).delete()
+    if followers_count(follow.author_id) == (
+        settings.FEED_FANOUT_MAX_FOLLOWERS
+    ):
+        backfill.delay(follow.author_id)
+
+
+def heavy_author_ids(user):
+    """Авторы из подписок пользователя, чьи посты читаются напрямую."""
+    return list(
+        Follow.objects.filter(
+            user=user,
+            author__stats__followers_count__gt=(
+                settings.FEED_FANOUT_MAX_FOLLOWERS
+            )
+        ).values_list('author_id', flat=True)
+    )
+
+
+def follow_feed(user):
+    """Посты авторов, на которых подписан пользователь.
+
+    У постов есть поля feed_date и feed_post для FEED_ORDERING и курсора.
+    Без тяжёлых авторов это столбцы FeedItem, и страница читается по
+    индексу (user, -pub_date, -post) без сортировки. С тяжёлыми авторами
+    их посты подмешиваются через OR, и ленту приходится сортировать.
+    """
+    heavy_ids = heavy_author_ids(user)
+    if not heavy_ids:
+        return Post.objects.filter(feed_items__user=user).annotate(
+            feed_date=F('feed_items__pub_date'),
+            feed_post=F('feed_items__post_id'),
+        )
+    return Post.objects.filter(
+        Q(pk__in=FeedItem.objects.filter(user=user).values('post_id'))
+        | Q(author_id__in=heavy_ids)
+    ).annotate(feed_date=F('pub_date'), feed_post=F('pk'))
+
+
+def rebuild_feeds():
+    """Пересобирает все ленты с нуля, например после импорта."""
+    FeedItem.objects.all().delete()
+    author_ids = UserStats.objects.filter(
+        followers_count__gt=0,
+        followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).values_list('user_id', flat=True)
+    for author_id in list(author_ids):
+        backfill(author_id)
@@ -0,0 +1,97 @@
+"""Адаптивные копии картинок постов.
+
+Для каждой ширины из settings.POST_IMAGE_WIDTHS картинка обрезается
+по центру в пропорции карточки (960x339) и сохраняется во всех
+форматах settings.POST_IMAGE_FORMATS: сначала компактные (WebP),
+последним — JPEG для старых браузеров. EXIF, ICC-профиль и прочие
+метаданные в копии не попадают.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+CARD_RATIO = 339 / 960
+MIME_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+}
+EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg'}
+
+
+def variant_name(name, width, image_format):
+    """Путь копии: posts/variants/<имя>-<ширина>.<расширение>."""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return (
+        f'{directory}/variants/{stem}-{width}.{EXTENSIONS[image_format]}'
+    )
+
+
+def parse_widths(value):
+    return [int(width) for width in value.split(',') if width]
+
+
+def sources(post):
+    """Наборы srcset по форматам; последний — запасной JPEG."""
+    widths = parse_widths(post.image_variants)
+    result = []
+    for image_format in settings.POST_IMAGE_FORMATS:
+        urls = {
+            width: default_storage.url(
+                variant_name(post.image.name, width, image_format)
+            )
+            for width in widths
+        }
+        result.append({
+            'type': MIME_TYPES[image_format],
+            'src': urls[widths[-1]],
+            'srcset': ', '.join(
+                f'{url} {width}w' for width, url in urls.items()
+            ),
+        })
+    return result
+
+
+def _open(name, storage, largest):
+    with storage.open(name) as source:
+        image = Image.open(source)
+        # JPEG декодируется сразу в уменьшенном размере
+        image.draft('RGB', (largest, round(largest * CARD_RATIO)))
+        image = ImageOps.exif_transpose(image)
+        return image.convert('RGB')
+
+
+def make_variants(name, storage=default_storage):
+    """Создаёт копии картинки name; возвращает строку их ширин."""
+    configured = sorted(settings.POST_IMAGE_WIDTHS)
+    image = _open(name, storage, configured[-1])
+    widths = [width for width in configured if width <= image.width]
+    widths = widths or configured[:1]
+    for width in widths:
+        resized = ImageOps.fit(
+            image, (width, round(width * CARD_RATIO)), Image.LANCZOS
+        )
+        resized.info = {}
+        for image_format in settings.POST_IMAGE_FORMATS:
+            buffer = BytesIO()
+            resized.save(
+                buffer, image_format.upper(),
+                quality=settings.POST_IMAGE_QUALITY, optimize=True,
+            )
+            target = variant_name(name, width, image_format)
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(buffer.getvalue()))
+    return ','.join(str(width) for width in widths)
+
+
+def delete_variants(name, widths, storage=default_storage):
+    """Удаляет копии картинки name с ширинами из строки widths."""
+    for width in parse_widths(widths):
+        for image_format in settings.POST_IMAGE_FORMATS:
+            storage.delete(variant_name(name, width, image_format))
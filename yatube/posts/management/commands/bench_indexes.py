@@ -0,0 +1,128 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from posts.feed import FEED_ORDERING, follow_feed
+from posts.models import Comment, FeedItem, Follow, Group, Post, UserStats
+from posts.seeding import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет временную базу и сравнивает планы и время горячих '
+        'запросов лент с индексами posts и без них.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--follows', type=int, default=20)
+        parser.add_argument('--comments', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        connection = connections[DEFAULT_DB_ALIAS]
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            self.run(connection, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def log(self, message):
+        self.stderr.write(message)
+
+    def run(self, connection, options):
+        started = time.perf_counter()
+        seed(
+            users=options['users'], groups=options['groups'],
+            posts=options['posts'], follows=options['follows'],
+            comments=options['comments'], log=self.log,
+        )
+        self.log(f'данные созданы за {time.perf_counter() - started:.1f} с')
+        queries = self.hot_queries()
+        with_indexes = self.measure(
+            connection, queries, options['repeat'], 'с индексами'
+        )
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for model in (Post, Comment, FeedItem):
+                    for index in model._meta.indexes:
+                        name = connection.ops.quote_name(index.name)
+                        cursor.execute(f'DROP INDEX {name}')
+            without_indexes = self.measure(
+                connection, queries, options['repeat'], 'без индексов'
+            )
+            transaction.set_rollback(True)
+        for name in queries:
+            self.report(name, without_indexes[name], with_indexes[name])
+
+    def hot_queries(self):
+        """Запросы страниц, которые чаще всего открывают читатели."""
+        per_page = settings.POST_LIMIT_PER_PAGE
+        author = UserStats.objects.order_by('-posts_count').first().user
+        reader = UserStats.objects.order_by('-following_count').first().user
+        group = Group.objects.order_by('pk').first()
+        post = Post.objects.order_by('-comments_count').first()
+        return {
+            'index': lambda: Post.objects.for_feed()[:per_page],
+            'index, страница 1000': lambda: (
+                Post.objects.for_feed()[per_page * 999:per_page * 1000]
+            ),
+            'profile': lambda: author.posts.for_feed()[:per_page],
+            'group_list': lambda: group.posts.for_feed()[:per_page],
+            'follow_index': lambda: (
+                follow_feed(reader).for_feed(FEED_ORDERING)[:per_page]
+            ),
+            'post_detail, комментарии': lambda: post.comments.for_post(),
+            'profile, подписан ли': lambda: Follow.objects.filter(
+                user=reader, author=author
+            ),
+        }
+
+    def explain(self, connection, queryset, label):
+        """План запроса.
+
+        Метка в комментарии меняет текст запроса: иначе sqlite3 возьмёт
+        подготовленный EXPLAIN из кеша и покажет план до DROP INDEX.
+        """
+        sql, params = queryset.query.sql_with_params()
+        prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql} /* {label} */', params)
+            return '\n'.join(
+                ' '.join(str(value) for value in row)
+                for row in cursor.fetchall()
+            )
+
+    def measure(self, connection, queries, repeat, label):
+        results = {}
+        for name, make_queryset in queries.items():
+            plan = self.explain(connection, make_queryset(), label)
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(make_queryset())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = {
+                'plan': plan,
+                'median': statistics.median(timings),
+                'max': max(timings),
+            }
+        return results
+
+    def report(self, name, before, after):
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        runs = (('без индексов', before), ('с индексами', after))
+        for title, result in runs:
+            self.stdout.write(
+                f'  {title}: медиана {result["median"]:.2f} мс, '
+                f'максимум {result["max"]:.2f} мс'
+            )
+            for line in result['plan'].splitlines():
+                self.stdout.write(f'    {line}')
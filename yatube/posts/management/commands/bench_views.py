@@ -0,0 +1,232 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import (
+    DEFAULT_DB_ALIAS, connections, reset_queries, transaction,
+)
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, get_resolver, reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.metrics import percentile
+from posts.models import Comment, Group, Post, UserStats
+from posts.seeding import seed
+
+NAMESPACES = ('posts', 'users', 'about')
+# заметнее, чем на столько процентов, — регрессия при --compare
+REGRESSION_THRESHOLD = 10
+# адреса, GET которых меняет данные: они замеряются в транзакции,
+# которая откатывается, чтобы каждый повтор видел те же данные;
+# остальные — без транзакции, как на сайте (иначе gather идёт
+# по очереди: потоки пула не видят незафиксированного)
+WRITING_ROUTES = frozenset({
+    'posts:post_delete', 'posts:delete_comment', 'posts:profile_follow',
+    'posts:profile_unfollow', 'users:logout',
+})
+BENCH_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bench_views',
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет временную базу и замеряет задержки (перцентили), '
+        'число запросов к БД и выделения памяти для каждого адреса '
+        'posts.urls, users.urls и about.urls. Результат — JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=50_000)
+        parser.add_argument('--follows', type=int, default=20)
+        parser.add_argument('--comments', type=int, default=20_000)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='очищать кеш перед каждым запросом',
+        )
+        parser.add_argument('--output', help='файл для результатов JSON')
+        parser.add_argument(
+            '--compare', help='JSON прошлого запуска для сравнения'
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[DEFAULT_DB_ALIAS]
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            # кеш отдельный: иначе страницы тестовой базы попадут
+            # в общий кеш работающего сайта
+            with override_settings(CACHES=BENCH_CACHES):
+                started = time.perf_counter()
+                seed(
+                    users=options['users'], groups=options['groups'],
+                    posts=options['posts'], follows=options['follows'],
+                    comments=options['comments'], log=self.log,
+                )
+                self.log(
+                    f'данные созданы за {time.perf_counter() - started:.1f} с'
+                )
+                results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {'meta': self.meta(options), 'routes': results}
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        else:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                self.compare(json.load(f)['routes'], results)
+
+    def log(self, message):
+        self.stderr.write(message)
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except OSError:
+            commit = ''
+        return {
+            'commit': commit,
+            'date': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'options': {
+                name: options[name] for name in (
+                    'users', 'groups', 'posts', 'follows', 'comments',
+                    'repeat', 'warmup', 'cold',
+                )
+            },
+        }
+
+    def fixtures(self):
+        """Значения параметров адресов из заполненной базы."""
+        user = UserStats.objects.order_by('-following_count').first().user
+        post = Post.objects.filter(author=user).first() or (
+            Post.objects.order_by('-comments_count').first()
+        )
+        comment = Comment.objects.filter(author=user).first() or (
+            Comment.objects.create(author=user, post=post, text='Замер')
+        )
+        return user, {
+            'username': user.username,
+            'post_id': post.pk,
+            'slug': Group.objects.order_by('pk').first().slug,
+            'comment_id': comment.pk,
+            'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+            'token': default_token_generator.make_token(user),
+        }
+
+    def routes(self, values):
+        """Имя адреса и готовый URL для каждого маршрута приложений."""
+        routes = {}
+        for pattern in get_resolver().url_patterns:
+            if getattr(pattern, 'namespace', None) not in NAMESPACES:
+                continue
+            for entry in pattern.url_patterns:
+                if not isinstance(entry, URLPattern) or not entry.name:
+                    continue
+                name = f'{pattern.namespace}:{entry.name}'
+                kwargs = {
+                    key: values[key] for key in entry.pattern.converters
+                }
+                routes[name] = reverse(name, kwargs=kwargs)
+        return routes
+
+    def request(self, client, user, url, cold, rollback):
+        """Один запрос; при rollback изменения в базе откатываются."""
+        if '_auth_user_id' not in client.session:
+            client.force_login(user)
+        if cold:
+            cache.clear()
+        with transaction.atomic() if rollback else nullcontext():
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - started
+            if rollback:
+                transaction.set_rollback(True)
+        return response, elapsed * 1000
+
+    def run(self, options):
+        user, values = self.fixtures()
+        client = Client()
+        results = {}
+        for name, url in self.routes(values).items():
+            args = (client, user, url, options['cold'], name in WRITING_ROUTES)
+            for _ in range(options['warmup']):
+                self.request(*args)
+            timings = [
+                self.request(*args)[1] for _ in range(options['repeat'])
+            ]
+            # при DEBUG журнал запросов ограничен и уже заполнен
+            reset_queries()
+            # запросы из потоков gather сюда не попали бы: число
+            # запросов считается при выполнении по очереди
+            with override_settings(VIEW_QUERY_THREADS=0), \
+                    CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as q:
+                response, _ = self.request(*args)
+            tracemalloc.start()
+            self.request(*args)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[name] = {
+                'url': url,
+                'status': response.status_code,
+                'p50_ms': round(percentile(timings, 0.5), 3),
+                'p90_ms': round(percentile(timings, 0.9), 3),
+                'p99_ms': round(percentile(timings, 0.99), 3),
+                'mean_ms': round(statistics.mean(timings), 3),
+                # служебные SAVEPOINT отката не считаются
+                'queries': sum(
+                    'SAVEPOINT' not in query['sql'] for query in q
+                ),
+                'peak_alloc_kib': round(peak / 1024, 1),
+            }
+            self.log(
+                f'{name}: p50 {results[name]["p50_ms"]} мс, '
+                f'запросов {results[name]["queries"]}'
+            )
+        return results
+
+    def compare(self, before, after):
+        self.stdout.write(self.style.MIGRATE_HEADING('Сравнение с прошлым'))
+        for name, result in after.items():
+            old = before.get(name)
+            if old is None:
+                self.stdout.write(f'  {name}: новый адрес')
+                continue
+            change = (result['p50_ms'] / old['p50_ms'] - 1) * 100
+            line = (
+                f'  {name}: p50 {old["p50_ms"]} → {result["p50_ms"]} мс '
+                f'({change:+.0f}%), запросов {old["queries"]} → '
+                f'{result["queries"]}'
+            )
+            regressed = (
+                change > REGRESSION_THRESHOLD
+                or result['queries'] > old['queries']
+            )
+            style = self.style.ERROR if regressed else self.style.SUCCESS
+            self.stdout.write(style(line))
@@ -0,0 +1,25 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import SPECS, WRITERS, export
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает группы, посты, комментарии или подписки в NDJSON/CSV '
+        'построчно, не загружая таблицу в память.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=SPECS)
+        parser.add_argument('path', help="файл или '-' для stdout")
+        parser.add_argument('--format', choices=WRITERS, default='ndjson')
+
+    def handle(self, *args, **options):
+        log = self.stderr.write
+        if options['path'] == '-':
+            export(options['model'], sys.stdout, options['format'], log)
+            return
+        with open(options['path'], 'w', encoding='utf-8', newline='') as f:
+            export(options['model'], f, options['format'], log)
@@ -0,0 +1,46 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import page_cache
+from posts.counters import rebuild_counters
+from posts.feed import rebuild_feeds
+from posts.search import get_backend
+from posts.transfer import READERS, SPECS, TransferError, import_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает группы, посты, комментарии или подписки из NDJSON/CSV '
+        'пачками через bulk_create. Группы и посты нужно загрузить раньше '
+        'ссылающихся на них записей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=SPECS)
+        parser.add_argument('path', help="файл или '-' для stdin")
+        parser.add_argument('--format', choices=READERS, default='ndjson')
+        parser.add_argument(
+            '--skip-rebuild', action='store_true',
+            help='не пересчитывать счётчики, ленты и поисковый индекс '
+                 '(если следом загружается ещё один файл)',
+        )
+
+    def handle(self, *args, **options):
+        log = self.stderr.write
+        try:
+            if options['path'] == '-':
+                import_records(
+                    options['model'], sys.stdin, options['format'], log
+                )
+            else:
+                with open(options['path'], encoding='utf-8', newline='') as f:
+                    import_records(options['model'], f, options['format'], log)
+        except TransferError as error:
+            raise CommandError(error)
+        if not options['skip_rebuild']:
+            rebuild_counters()
+            rebuild_feeds()
+            get_backend().rebuild()
+            page_cache.invalidate()
+            log('счётчики, ленты и поисковый индекс пересчитаны')
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-17 12:00
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_pub_date(apps, schema_editor):
+    FeedItem = apps.get_model('posts', 'FeedItem')
+    Post = apps.get_model('posts', 'Post')
+    FeedItem.objects.update(pub_date=models.Subquery(
+        Post.objects.filter(pk=models.OuterRef('post_id')).values('pub_date')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feeditem',
+            name='pub_date',
+            field=models.DateTimeField(default=timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_pub_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='feeditem',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='feeditem_user_pub_date_idx'),
+        ),
+    ]
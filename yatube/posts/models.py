@@ -20,6 +20,18 @@ class Group(models.Model):
         verbose_name_plural = 'Группы'
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self, ordering=('-pub_date', '-pk')):
+        """Посты для списков: автор и группа тем же запросом."""
+        return self.select_related('author', 'group').only(
+            'text', 'pub_date', 'image', 'image_variants',
+            'comments_count', 'card_version',
+            'author', 'author__username',
+            'author__first_name', 'author__last_name',
+            'group', 'group__title', 'group__slug',
+        ).order_by(*ordering)
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
@@ -45,6 +57,20 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False
+    )
+    # ширины готовых копий картинки через запятую, см. posts.images
+    image_variants = models.CharField(
+        max_length=64, blank=True, default='', editable=False
+    )
+    card_version = models.PositiveIntegerField(default=0, editable=False)
+    # меняется при правке поста и сбросе его карточек, см. posts.conditional
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:settings.LIMIT_PAGES_4TEST]
@@ -52,6 +78,33 @@ class Post(models.Model):
     class Meta:
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', 'updated_at'],
+                name='post_author_updated_idx'
+            ),
+            models.Index(
+                fields=['group', 'updated_at'],
+                name='post_group_updated_idx'
+            ),
+        ]
+
+
+class CommentQuerySet(models.QuerySet):
+    def for_post(self):
+        """Комментарии под постом вместе с авторами."""
+        return self.select_related('author').order_by('pub_date', 'pk')
 
 
 class Comment(CreatedModel):
@@ -69,10 +122,25 @@ class Comment(CreatedModel):
         on_delete=models.CASCADE,
         related_name='comments'
     )
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    objects = CommentQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'pub_date', 'id'],
+                name='comment_post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['post', 'updated_at'],
+                name='comment_post_updated_idx'
+            ),
+        ]
+
 
 class Follow(CreatedModel):
 
@@ -86,3 +154,58 @@ class Follow(CreatedModel):
         on_delete=models.CASCADE,
         related_name='following'
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, которые поддерживаются сигналами."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков', default=0
+    )
+    following_count = models.PositiveIntegerField('Число подписок', default=0)
+
+    def __str__(self):
+        return str(self.user)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+
+class FeedItem(models.Model):
+    """Запись ленты подписок, разложенная по читателям при публикации."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_items'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_items'
+    )
+    # копия Post.pub_date: лента читается и листается по индексу
+    # этой таблицы, без сортировки постов
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='feeditem_user_pub_date_idx'
+            ),
+        ]
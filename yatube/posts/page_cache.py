@@ -0,0 +1,156 @@
+"""Кеш страниц главной ленты со сбросом по событиям.
+
+Каждая запись хранится вместе с токеном поколения. Сохранение или
+удаление поста, правка группы или автора меняют токен, и все страницы
+разом становятся устаревшими, но не пропадают из кеша.
+
+Пересобирает устаревшую страницу только тот запрос, который первым
+взял блокировку (cache.add). Остальные в это время получают прежнюю
+версию, а если её нет — недолго ждут результата сборщика.
+
+Ключ страницы строится не из сырых ?page=/?after=/?before=, а из
+номера страницы, к которому их приводит Paginator, или из
+разобранного курсора: мусорные параметры не плодят записей в кеше.
+"""
+import hashlib
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import transaction
+
+from .utils import CursorPage, cursor_paginate, decode_cursor
+
+GENERATION_KEY = 'index_page:generation'
+COUNT_KEY = 'index_page:count'
+WAIT_STEP = 0.05
+WAIT_LIMIT = 2
+
+
+def _new_generation():
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate():
+    """Помечает все закешированные страницы ленты устаревшими.
+
+    Токен меняется ещё раз после коммита: иначе страница, собранная
+    параллельным запросом до коммита, сохранилась бы как свежая.
+    """
+    _new_generation()
+    transaction.on_commit(_new_generation)
+
+
+def _generation(cached):
+    token = cached.get(GENERATION_KEY)
+    if token is None:
+        token = uuid.uuid4().hex
+        if not cache.add(GENERATION_KEY, token, None):
+            token = cache.get(GENERATION_KEY, token)
+    return token
+
+
+def _page_key(position):
+    digest = hashlib.md5(position.encode()).hexdigest()
+    return f'index_page:{digest}'
+
+
+def _count(posts, token):
+    count = posts.count()
+    cache.set(COUNT_KEY, (token, count), _timeout())
+    return count
+
+
+def _cursor_page(request, posts):
+    """Позиция и сборщик страницы по курсору, как в cursor_paginator."""
+    for name in ('before', 'after'):
+        position = decode_cursor(request.GET.get(name, ''))
+        if position is not None:
+            date, pk = position
+            return (
+                f'{name}={date.isoformat()}|{pk}',
+                lambda: cursor_paginate(posts, **{name: position}),
+            )
+    return 'first', lambda: cursor_paginate(posts)
+
+
+def _numbered_page(request, posts, cached, token):
+    """Позиция и сборщик страницы с номером, как в paginator.
+
+    Номер приводится по числу постов из кеша, даже устаревшему;
+    пересчитывает его только сборщик страницы.
+    """
+    entry = cached.get(COUNT_KEY)
+    count = _count(posts, token) if entry is None else entry[1]
+
+    def numbered(count):
+        page_paginator = Paginator(posts, settings.POST_LIMIT_PER_PAGE)
+        page_paginator.count = count
+        return page_paginator.get_page(request.GET.get('page'))
+
+    def build():
+        if entry is None or entry[0] == token:
+            return numbered(count)
+        return numbered(_count(posts, token))
+
+    return f'page={numbered(count).number}', build
+
+
+def _freeze(page_obj):
+    """Page нельзя класть в кеш целиком: с ним уедет весь queryset."""
+    if isinstance(page_obj, CursorPage):
+        return page_obj
+    return (
+        list(page_obj.object_list), page_obj.number, page_obj.paginator.count
+    )
+
+
+def _thaw(frozen, posts):
+    if isinstance(frozen, CursorPage):
+        return frozen
+    object_list, number, count = frozen
+    page_paginator = Paginator(posts, settings.POST_LIMIT_PER_PAGE)
+    page_paginator.count = count
+    return Page(object_list, number, page_paginator)
+
+
+def _timeout():
+    """Разброс срока жизни, чтобы страницы не истекали одновременно."""
+    timeout = settings.INDEX_PAGE_CACHE_TIMEOUT
+    return timeout + random.randint(0, timeout // 10)
+
+
+def cached_page(request, posts):
+    """Страница ленты из кеша; пересобирается одним запросом."""
+    cached = cache.get_many([GENERATION_KEY, COUNT_KEY])
+    token = _generation(cached)
+    if settings.POST_CURSOR_PAGINATION:
+        position, build = _cursor_page(request, posts)
+    else:
+        position, build = _numbered_page(request, posts, cached, token)
+    key = _page_key(position)
+    lock_key = f'{key}:lock'
+    entry = cache.get(key)
+    if entry is not None and entry[0] == token:
+        return _thaw(entry[1], posts)
+
+    if cache.add(lock_key, 1, settings.INDEX_PAGE_LOCK_TIMEOUT):
+        try:
+            frozen = _freeze(build())
+            cache.set(key, (token, frozen), _timeout())
+        finally:
+            cache.delete(lock_key)
+        return _thaw(frozen, posts)
+
+    if entry is not None:
+        return _thaw(entry[1], posts)
+    deadline = time.monotonic() + WAIT_LIMIT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_STEP)
+        entry = cache.get(key)
+        if entry is not None:
+            return _thaw(entry[1], posts)
+    return build()
@@ -0,0 +1,169 @@
+"""Полнотекстовый поиск по тексту постов.
+
+Бэкенд выбирается настройкой POST_SEARCH_BACKEND. SQLiteFTSBackend
+держит обратный индекс в виртуальной таблице FTS5 posts_search
+(rowid = id поста) и ранжирует результаты по bm25. SimpleSearchBackend
+работает на любой базе, но без индекса: это LIKE по всей таблице.
+
+Индекс обновляется сигналами при сохранении и удалении поста; после
+массовых вставок (bulk_create, импорт) его пересобирает rebuild().
+"""
+import re
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Post
+
+FTS_TABLE = 'posts_search'
+WORD = re.compile(r'\w+')
+# unicode61 не снимает диакритику с кириллицы: «ё» приводится к «е»
+# и в индексе, и в запросе
+NORMALIZED_TEXT = "REPLACE(REPLACE(text, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def normalize(text):
+    return text.replace('ё', 'е').replace('Ё', 'Е')
+
+
+def words(query):
+    return WORD.findall(normalize(query.lower()))
+
+
+class SimpleSearchBackend:
+    """Поиск без индекса: все слова запроса должны входить в текст."""
+
+    def _condition(self, query):
+        condition = Q()
+        for word in words(query):
+            condition &= Q(text__icontains=word)
+        return condition
+
+    def filter(self, queryset, query):
+        if not words(query):
+            return queryset.none()
+        return queryset.filter(self._condition(query))
+
+    def count(self, query):
+        return self.filter(Post.objects.all(), query).count()
+
+    def ids(self, query, offset, limit):
+        posts = self.filter(Post.objects.all(), query).order_by(
+            '-pub_date', '-pk'
+        )
+        return list(posts.values_list('pk', flat=True)[offset:offset + limit])
+
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class SQLiteFTSBackend:
+    """Индекс FTS5; таблица создаётся миграцией 0012_post_search."""
+
+    def _match(self, query):
+        """Слова запроса в кавычках, последнее — как префикс."""
+        terms = [f'"{word}"' for word in words(query)]
+        if terms:
+            terms[-1] += '*'
+        return ' '.join(terms)
+
+    def _execute(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def filter(self, queryset, query):
+        match = self._match(query)
+        if not match:
+            return queryset.none()
+        # pk__in=RawSQL(...) оборачивает подзапрос во вторые скобки,
+        # и SQLite берёт из него только первую строку
+        return queryset.extra(
+            where=[
+                f'{Post._meta.db_table}.id IN (SELECT rowid FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s)'
+            ],
+            params=[match],
+        )
+
+    def count(self, query):
+        match = self._match(query)
+        if not match:
+            return 0
+        return self._execute(
+            f'SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (match,)
+        )[0][0]
+
+    def ids(self, query, offset, limit):
+        match = self._match(query)
+        if not match:
+            return []
+        rows = self._execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY rank LIMIT %s OFFSET %s',
+            (match, limit, offset)
+        )
+        return [pk for pk, in rows]
+
+    def index(self, post):
+        self.remove(post.pk)
+        self._execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+            (post.pk, normalize(post.text))
+        )
+
+    def remove(self, post_id):
+        self._execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (post_id,)
+        )
+
+    def rebuild(self):
+        """Пересобирает индекс одним INSERT ... SELECT."""
+        self._execute(f'DELETE FROM {FTS_TABLE}')
+        self._execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) '
+            f'SELECT id, {NORMALIZED_TEXT} FROM {Post._meta.db_table}'
+        )
+        self._execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"
+        )
+
+
+def get_backend():
+    return import_string(settings.POST_SEARCH_BACKEND)()
+
+
+class SearchResults(Sequence):
+    """Найденные посты в порядке релевантности, для Paginator.
+
+    Срез запрашивает у бэкенда только id нужной страницы, а посты
+    подгружает одним запросом for_feed.
+    """
+
+    def __init__(self, query, backend=None):
+        self.query = query
+        self.backend = backend or get_backend()
+        self._count = None
+
+    def __len__(self):
+        if self._count is None:
+            self._count = self.backend.count(self.query)
+        return self._count
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop, _ = index.indices(len(self))
+        ids = self.backend.ids(self.query, start, stop - start)
+        posts = Post.objects.for_feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
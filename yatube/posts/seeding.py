@@ -0,0 +1,128 @@
+"""Наполнение базы синтетическими данными для замеров производительности.
+
+Записи создаются через bulk_create пачками, поэтому сигналы не
+срабатывают: счётчики и ленты подписок пересчитываются в конце.
+"""
+import random
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .counters import rebuild_counters
+from .feed import rebuild_feeds
+from .models import Comment, Follow, Group, Post, User
+from .search import get_backend
+from .utils import BATCH_SIZE, chunked
+
+SECONDS_IN_YEAR = 365 * 24 * 60 * 60
+
+
+@contextmanager
+def explicit_dates(*models):
+    """Даёт bulk_create сохранить заданный pub_date вместо текущего."""
+    fields = [model._meta.get_field('pub_date') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _zipf_weights(count):
+    """Немногие авторы пишут много, большинство — мало."""
+    return [1 / rank for rank in range(1, count + 1)]
+
+
+def seed(users=100, groups=10, posts=1000, follows=10, comments=0,
+         random_seed=0, log=None):
+    """Создаёт пользователей, группы, посты, подписки и комментарии."""
+    log = log or (lambda message: None)
+    rnd = random.Random(random_seed)
+    tag = uuid.uuid4().hex[:8]
+    now = timezone.now()
+
+    def random_date():
+        return now - timedelta(seconds=rnd.randrange(SECONDS_IN_YEAR))
+
+    User.objects.bulk_create(
+        User(
+            username=f'seed_{tag}_{number}',
+            first_name='Имя', last_name=f'Фамилия {number}',
+            password='!',
+        )
+        for number in range(users)
+    )
+    user_ids = list(User.objects.filter(
+        username__startswith=f'seed_{tag}_'
+    ).values_list('pk', flat=True))
+    Group.objects.bulk_create(
+        Group(
+            title=f'Группа {tag} {number}',
+            slug=f'seed-{tag}-{number}',
+            description='Сгенерированная группа',
+        )
+        for number in range(groups)
+    )
+    group_ids = list(Group.objects.filter(
+        slug__startswith=f'seed-{tag}-'
+    ).values_list('pk', flat=True)) + [None]
+    log(f'пользователей: {users}, групп: {groups}')
+
+    weights = _zipf_weights(len(user_ids))
+    last_post = Post.objects.order_by('-pk').values_list('pk', flat=True)
+    first_id = (last_post.first() or 0) + 1
+    with explicit_dates(Post, Comment, Follow):
+        for done, chunk in enumerate(chunked(range(posts)), start=1):
+            authors = rnd.choices(user_ids, weights, k=len(chunk))
+            Post.objects.bulk_create(
+                Post(
+                    author_id=author_id,
+                    group_id=rnd.choice(group_ids),
+                    text=f'Сгенерированный пост {number}',
+                    pub_date=random_date(),
+                )
+                for number, author_id in zip(chunk, authors)
+            )
+            if done % 100 == 0:
+                log(f'постов: {done * BATCH_SIZE}')
+        log(f'постов: {posts}')
+
+        pairs = (
+            (user_id, author_id)
+            for user_id in user_ids
+            for author_id in set(rnd.choices(
+                user_ids, weights, k=min(follows, len(user_ids))
+            ))
+            if author_id != user_id
+        )
+        for chunk in chunked(pairs):
+            Follow.objects.bulk_create(
+                Follow(user_id=user_id, author_id=author_id,
+                       pub_date=random_date())
+                for user_id, author_id in chunk
+            )
+        log(f'подписок: до {follows} на пользователя')
+
+        if comments and posts:
+            last_id = last_post.first()
+            for chunk in chunked(range(comments)):
+                Comment.objects.bulk_create(
+                    Comment(
+                        author_id=rnd.choice(user_ids),
+                        post_id=rnd.randint(first_id, last_id),
+                        text='Сгенерированный комментарий',
+                        pub_date=random_date(),
+                    )
+                    for _ in chunk
+                )
+            log(f'комментариев: {comments}')
+
+    rebuild_counters()
+    rebuild_feeds()
+    get_backend().rebuild()
+    log('счётчики, ленты и поисковый индекс пересчитаны')
+    return tag
@@ -0,0 +1,130 @@
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from . import (
+    cards, conditional, counters, feed, page_cache, search, thumbnails
+)
+from .admin import forget_group_choices
+from .models import Comment, Follow, Group, Post, User
+
+# поля пользователя, которые видны на карточках его постов
+CARD_USER_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    # прежние картинка и группа: копии картинки удаляются, если её
+    # сменили, а страница прежней группы не должна устареть
+    stored = None
+    if instance.pk:
+        stored = Post.objects.filter(pk=instance.pk).values_list(
+            'image', 'image_variants', 'group_id'
+        ).first()
+    instance._stored_image = stored and stored[:2]
+    instance._stored_group_id = stored and stored[2]
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    page_cache.invalidate()
+    search.get_backend().index(instance)
+    if created:
+        counters.change_user_counter(instance.author_id, 'posts_count', 1)
+        feed.fan_out_post(instance)
+    else:
+        cards.bump_card_version(pk=instance.pk)
+    stored = getattr(instance, '_stored_image', None)
+    if stored and stored[0] != instance.image.name:
+        thumbnails.forget(*stored)
+    group_id = getattr(instance, '_stored_group_id', None)
+    if group_id and group_id != instance.group_id:
+        conditional.touch_latest(group_id=group_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    page_cache.invalidate()
+    counters.change_user_counter(instance.author_id, 'posts_count', -1)
+    cards.forget_cards(instance)
+    search.get_backend().remove(instance.pk)
+    thumbnails.forget(instance.image.name, instance.image_variants)
+    conditional.touch_latest(author_id=instance.author_id)
+    if instance.group_id:
+        conditional.touch_latest(group_id=instance.group_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_comments_counter(instance.post_id, 1)
+    cards.bump_card_version(pk=instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_comments_counter(instance.post_id, -1)
+    cards.bump_card_version(pk=instance.post_id)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    forget_group_choices()
+    if not created:
+        cards.bump_card_version(group=instance)
+        page_cache.invalidate()
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    # посты отвязываются от группы UPDATE без post_save: карточки со
+    # ссылкой на группу сбрасываются до этого
+    cards.bump_card_version(group=instance)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    forget_group_choices()
+    page_cache.invalidate()
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields, **kwargs):
+    """Отмечает, меняет ли сохранение имя, которое видно на карточках.
+
+    Вход, смена пароля и другие правки карточки не трогают.
+    """
+    fields = CARD_USER_FIELDS if update_fields is None else [
+        name for name in CARD_USER_FIELDS if name in update_fields
+    ]
+    instance._card_fields_changed = bool(fields and instance.pk) and (
+        User.objects.filter(pk=instance.pk).exclude(**{
+            name: getattr(instance, name) for name in fields
+        }).exists()
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if created or not getattr(instance, '_card_fields_changed', False):
+        return
+    cards.bump_card_version(author=instance)
+    # имя видно и под комментариями: их страницы тоже устарели
+    conditional.touch(comments__author=instance)
+    page_cache.invalidate()
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user_counter(instance.author_id, 'followers_count', 1)
+        counters.change_user_counter(instance.user_id, 'following_count', 1)
+        feed.add_follow(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.change_user_counter(instance.author_id, 'followers_count', -1)
+    counters.change_user_counter(instance.user_id, 'following_count', -1)
+    feed.remove_follow(instance)
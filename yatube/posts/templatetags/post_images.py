@@ -0,0 +1,11 @@
+from django import template
+
+from ..images import sources
+
+register = template.Library()
+
+
+@register.simple_tag
+def image_sources(post):
+    """Форматы и srcset копий картинки поста; последний — запасной."""
+    return sources(post)
@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.add_posts(3)
+
+    @classmethod
+    def add_posts(cls, number):
+        for x in range(number):
+            author = User.objects.create_user(
+                username=f'author_{Post.objects.count()}'
+            )
+            group = Group.objects.create(
+                title=f'Группа {author.username}', slug=author.username
+            )
+            Post.objects.create(author=author, group=group, text='Пост')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+        cache.clear()
+
+    def get_changelist(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response, queries
+
+    def test_queries_do_not_grow_with_rows(self):
+        """Число запросов списка не зависит от числа строк и групп."""
+        self.get_changelist()
+        _, before = self.get_changelist()
+        self.add_posts(5)
+        self.get_changelist()
+        _, after = self.get_changelist()
+        self.assertEqual(len(before), len(after))
+        self.assertFalse(
+            [q for q in after if 'FROM "posts_group"' in q['sql']]
+        )
+
+    def test_group_choices_follow_changes(self):
+        """Новая группа сразу появляется в выпадающем списке."""
+        self.get_changelist()
+        Group.objects.create(title='Свежая группа', slug='fresh')
+        response, _ = self.get_changelist()
+        self.assertContains(response, 'Свежая группа')
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=2)
+    def test_estimated_count(self):
+        """На большой таблице COUNT(*) по ней не выполняется."""
+        response, queries = self.get_changelist()
+        self.assertEqual(
+            response.context['cl'].result_count,
+            Post.objects.order_by('pk').last().pk
+        )
+        self.assertFalse([
+            q for q in queries
+            if 'COUNT(*)' in q['sql'] and 'posts_post' in q['sql']
+        ])
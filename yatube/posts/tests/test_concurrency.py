@@ -0,0 +1,77 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .. import concurrency
+from ..concurrency import gather
+from ..models import Post
+
+User = get_user_model()
+
+
+class GatherTests(TransactionTestCase):
+    def test_runs_in_pool_and_keeps_order(self):
+        """Первая функция — в текущем потоке, остальные — в пуле."""
+        names = gather(
+            *[lambda: threading.current_thread().name] * 3
+        )
+        self.assertEqual(names[0], threading.current_thread().name)
+        self.assertTrue(all(
+            name.startswith('view-query') for name in names[1:]
+        ))
+
+    def test_raises_after_all_finished(self):
+        done = []
+
+        def missing():
+            raise Http404
+
+        with self.assertRaises(Http404):
+            gather(lambda: 1, missing, lambda: done.append(True))
+        self.assertEqual(done, [True])
+
+    @override_settings(VIEW_QUERY_THREADS=0)
+    def test_disabled(self):
+        names = gather(*[lambda: threading.current_thread().name] * 2)
+        self.assertEqual(set(names), {threading.current_thread().name})
+
+    def test_serial_when_pool_is_busy(self):
+        """Без свободных потоков функции не ждут пул, а идут по очереди."""
+        _, slots = concurrency._pool()
+        taken = 0
+        while slots.acquire(blocking=False):
+            taken += 1
+        try:
+            names = gather(*[lambda: threading.current_thread().name] * 3)
+        finally:
+            for _ in range(taken):
+                slots.release()
+        self.assertEqual(set(names), {threading.current_thread().name})
+
+    def test_profile_reads_from_threads(self):
+        """Страница автора собирается из запросов в разных потоках."""
+        cache.clear()
+        author = User.objects.create_user(username='author')
+        Post.objects.create(author=author, text='Пост в потоке')
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'author'})
+        )
+        self.assertContains(response, 'Пост в потоке')
+        self.assertEqual(response.context['author'], author)
+
+
+class GatherInTransactionTests(TestCase):
+    def test_serial_inside_transaction(self):
+        """Незафиксированные данные видны: запросы идут по очереди."""
+        author = User.objects.create_user(username='author')
+        Post.objects.create(author=author, text='Пост')
+        names, count = gather(
+            lambda: threading.current_thread().name,
+            lambda: Post.objects.filter(author=author).count(),
+        )
+        self.assertEqual(names, threading.current_thread().name)
+        self.assertEqual(count, 1)
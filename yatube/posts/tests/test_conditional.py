@@ -0,0 +1,121 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+        cls.urls = {
+            'post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': cls.post.pk}
+            ),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': cls.author.username}
+            ),
+            'group_list': reverse(
+                'posts:group_list', kwargs={'slug': cls.group.slug}
+            ),
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def revalidate(self, url, response, client=None):
+        return (client or self.client).get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+
+    def test_not_modified(self):
+        """Совпавший ETag даёт 304 без тела."""
+        for name, url in self.urls.items():
+            with self.subTest(view=name):
+                response = self.client.get(url)
+                self.assertTrue(response.has_header('Last-Modified'))
+                repeat = self.revalidate(url, response)
+                self.assertEqual(repeat.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(repeat.content, b'')
+
+    def test_changes_invalidate(self):
+        """Правка, комментарий и удаление меняют ETag своих страниц."""
+        changes = {
+            'post_detail': lambda: Comment.objects.create(
+                author=self.author, post=self.post, text='Новый'
+            ),
+            'profile': self.post.save,
+            'group_list': Post.objects.create(
+                author=self.author, group=self.group, text='Удалить'
+            ).delete,
+        }
+        for name, change in changes.items():
+            with self.subTest(view=name):
+                url = self.urls[name]
+                response = self.client.get(url)
+                change()
+                repeat = self.revalidate(url, response)
+                self.assertEqual(repeat.status_code, HTTPStatus.OK)
+                self.assertNotEqual(repeat['ETag'], response['ETag'])
+
+    def test_last_modified_moves_forward_on_delete(self):
+        """Удаление свежего поста не возвращает Last-Modified назад."""
+        now = timezone.now()
+        for name in ('profile', 'group_list'):
+            with self.subTest(view=name):
+                Post.objects.filter(pk=self.post.pk).update(
+                    updated_at=now - timedelta(days=1)
+                )
+                newest = Post.objects.create(
+                    author=self.author, group=self.group, text='Свежий'
+                )
+                Post.objects.filter(pk=newest.pk).update(
+                    updated_at=now - timedelta(hours=1)
+                )
+                url = self.urls[name]
+                response = self.client.get(url)
+                newest.delete()
+                repeat = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(repeat.status_code, HTTPStatus.OK)
+
+    def test_commenter_rename_invalidates_post(self):
+        """Имя автора комментария входит в состояние страницы поста."""
+        reader = User.objects.create_user(username='reader')
+        Comment.objects.create(author=reader, post=self.post, text='Ок')
+        url = self.urls['post_detail']
+        response = self.client.get(url)
+        reader.first_name = 'Новое'
+        reader.save()
+        repeat = self.revalidate(url, response)
+        self.assertEqual(repeat.status_code, HTTPStatus.OK)
+
+    def test_etag_depends_on_user(self):
+        """Вошедший пользователь не получает 304 на страницу гостя."""
+        url = self.urls['post_detail']
+        response = self.client.get(url)
+        client = Client()
+        client.force_login(self.author)
+        repeat = self.revalidate(url, response, client)
+        self.assertEqual(repeat.status_code, HTTPStatus.OK)
+
+    def test_missing_object(self):
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,118 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..feed import follow_feed
+from ..models import FeedItem, Follow, Post
+
+User = get_user_model()
+
+
+class FollowFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(author=cls.author, text='Старый')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow(self):
+        self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}
+        ))
+
+    def test_follow_fans_out_posts(self):
+        """Подписка и новые посты попадают в ленту, отписка убирает их."""
+        self.follow()
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        self.assertEqual(
+            set(FeedItem.objects.filter(user=self.reader)
+                .values_list('post_id', flat=True)),
+            {self.old_post.pk, new_post.pk}
+        )
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'][0], new_post)
+        self.client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author}
+        ))
+        self.assertFalse(FeedItem.objects.filter(user=self.reader).exists())
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=0)
+    def test_heavy_author_read_on_fan_in(self):
+        """Посты тяжёлого автора не раскладываются, но видны в ленте."""
+        self.follow()
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        self.assertFalse(FeedItem.objects.exists())
+        self.assertEqual(
+            set(follow_feed(self.reader)), {self.old_post, new_post}
+        )
+
+    def test_author_back_below_threshold_is_backfilled(self):
+        """Автор, переставший быть тяжёлым, догружается в ленты."""
+        other = User.objects.create_user(username='other')
+        with self.settings(FEED_FANOUT_MAX_FOLLOWERS=1):
+            Follow.objects.create(user=self.reader, author=self.author)
+            Follow.objects.create(user=other, author=self.author)
+            Post.objects.create(author=self.author, text='Новый')
+            self.assertEqual(FeedItem.objects.count(), 1)
+            Follow.objects.filter(user=other).delete()
+        call_command('worker', once=True, threads=1, stdout=StringIO())
+        self.assertEqual(FeedItem.objects.filter(user=self.reader).count(), 2)
+
+    @override_settings(FEED_BACKFILL_INLINE=2)
+    def test_follow_backfills_every_post(self):
+        """Посты сверх FEED_BACKFILL_INLINE догружаются задачей."""
+        posts = [self.old_post] + [
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+            for number in range(4)
+        ]
+        self.follow()
+        self.assertEqual(FeedItem.objects.filter(user=self.reader).count(), 2)
+        call_command('worker', once=True, threads=1, stdout=StringIO())
+        self.assertEqual(
+            set(follow_feed(self.reader)), set(posts)
+        )
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 5)
+
+    @override_settings(FEED_FANOUT_INLINE_MAX=0)
+    def test_large_audience_fans_out_in_queue(self):
+        """Большой аудитории пост раскладывает задача очереди."""
+        self.follow()
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        self.assertFalse(
+            FeedItem.objects.filter(post=new_post).exists()
+        )
+        call_command('worker', once=True, threads=1, stdout=StringIO())
+        self.assertTrue(
+            FeedItem.objects.filter(user=self.reader, post=new_post).exists()
+        )
+
+    @override_settings(POST_CURSOR_PAGINATION=True, POST_LIMIT_PER_PAGE=2)
+    def test_pages_by_feed_item_date(self):
+        """Лента листается курсором по дате, скопированной в FeedItem."""
+        self.follow()
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+            for number in range(3)
+        ]
+        self.assertEqual(
+            set(FeedItem.objects.values_list('post_id', 'pub_date')),
+            {(post.pk, post.pub_date) for post in [self.old_post, *posts]}
+        )
+        url = reverse('posts:follow_index')
+        first = self.client.get(url).context['page_obj']
+        second = self.client.get(
+            url, {'after': first.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(
+            list(first) + list(second),
+            [posts[2], posts[1], posts[0], self.old_post]
+        )
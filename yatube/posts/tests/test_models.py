@@ -1,8 +1,12 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
 
-from ..models import Group, Post
+from ..models import Comment, Follow, Group, Post, UserStats
 
 User = get_user_model()
 
@@ -32,3 +36,54 @@ class PostModelTest(TestCase):
         post = PostModelTest.post
         expected_object_name = post.text[:settings.LIMIT_PAGES_4TEST]
         self.assertEqual(expected_object_name, str(post))
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def assertStats(self, user, posts, followers, following):
+        stats = UserStats.objects.get(user=user)
+        self.assertEqual(
+            (stats.posts_count, stats.followers_count, stats.following_count),
+            (posts, followers, following)
+        )
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются при создании и удалении записей."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(author=self.reader, post=post, text='Ок')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertStats(self.author, 2, 1, 0)
+        self.assertStats(self.reader, 0, 0, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+        post.comments.all().delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        post.delete()
+        Follow.objects.all().delete()
+        self.assertStats(self.author, 1, 0, 0)
+        self.assertStats(self.reader, 0, 0, 0)
+
+    def test_rebuild_counters(self):
+        """Команда rebuild_counters пересчитывает сбитые счётчики."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(author=self.reader, post=post, text='Ок')
+        UserStats.objects.update(posts_count=100)
+        Post.objects.update(comments_count=100)
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertStats(self.author, 1, 0, 0)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_follow_is_unique(self):
+        """Дважды подписаться на одного автора нельзя."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.author)
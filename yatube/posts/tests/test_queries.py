@@ -0,0 +1,175 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.conf import settings
+
+from ..models import Comment, Follow, Group, Post
+from ..utils import encode_cursor
+
+User = get_user_model()
+POST_PER_PAGE = settings.POST_LIMIT_PER_PAGE
+
+
+class QueryCountTests(TestCase):
+    """Число запросов каждой страницы posts.urls не зависит от данных.
+
+    Каждый адрес запрашивается дважды: на почти пустой базе и после того,
+    как в неё добавлены посты разных авторов, группы, комментарии и
+    подписки. Запрос на каждую запись (N+1) меняет число запросов.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+        cls.comment = Comment.objects.create(
+            author=cls.user, post=cls.post, text='Ок'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.noise = 0
+
+    def add_noise(self):
+        """Добавляет данных так, чтобы заполнить страницы целиком."""
+        self.noise += 1
+        for number in range(POST_PER_PAGE + 2):
+            author = User.objects.create_user(
+                username=f'noise_{self.noise}_{number}',
+                first_name='Имя', last_name='Фамилия',
+            )
+            group = Group.objects.create(
+                title=f'Группа {self.noise}_{number}',
+                slug=f'group_{self.noise}_{number}',
+                description='Описание',
+            )
+            Follow.objects.create(user=self.user, author=author)
+            for target_group in (group, self.group):
+                post = Post.objects.create(
+                    author=author, group=target_group, text='Шум'
+                )
+                Comment.objects.create(author=author, post=post, text='Шум')
+            Post.objects.create(
+                author=self.author, group=self.group, text='Шум'
+            )
+            Comment.objects.create(author=author, post=self.post, text='Шум')
+
+    def count_queries(self, make_request):
+        cache.clear()
+        method, url, data = make_request()
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data)
+        self.assertLess(response.status_code, 400, url)
+        return len(queries)
+
+    def assertQueriesStable(self, make_request):
+        with transaction.atomic():
+            before = self.count_queries(make_request)
+            self.add_noise()
+            after = self.count_queries(make_request)
+            self.assertEqual(before, after)
+            # каждая проверка начинается с почти пустой базы
+            transaction.set_rollback(True)
+
+    def new_post(self):
+        return Post.objects.create(author=self.user, text='Свой пост')
+
+    def test_read_views(self):
+        """Страницы со списками и постом не делают запросов на запись."""
+        comments = reverse(
+            'posts:comments', kwargs={'post_id': self.post.pk}
+        )
+        urls = {
+            'index': reverse('posts:index'),
+            'group_list': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}
+            ),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': self.author}
+            ),
+            'post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}
+            ),
+            'follow_index': reverse('posts:follow_index'),
+            'search': reverse('posts:search') + '?q=пост',
+            'post_create': reverse('posts:post_create'),
+            'comments': comments,
+            'comments_after': (
+                comments + '?after=' + encode_cursor(self.comment)
+            ),
+        }
+        for name, url in urls.items():
+            with self.subTest(view=name):
+                self.assertQueriesStable(lambda: ('get', url, None))
+
+    def test_post_edit(self):
+        post = self.new_post()
+        self.assertQueriesStable(lambda: (
+            'get',
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            None,
+        ))
+
+    def test_post_delete(self):
+        self.assertQueriesStable(lambda: (
+            'get',
+            reverse(
+                'posts:post_delete', kwargs={'post_id': self.new_post().pk}
+            ),
+            None,
+        ))
+
+    def test_add_comment(self):
+        self.assertQueriesStable(lambda: (
+            'post',
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'},
+        ))
+
+    def test_comment_delete(self):
+        def make_request():
+            comment = Comment.objects.create(
+                author=self.user, post=self.post, text='Удалить'
+            )
+            return (
+                'get',
+                reverse(
+                    'posts:delete_comment', kwargs={'comment_id': comment.pk}
+                ),
+                None,
+            )
+        self.assertQueriesStable(make_request)
+
+    def test_profile_follow_unfollow(self):
+        def new_author(follow):
+            author = User.objects.create_user(
+                username=f'new_author_{User.objects.count()}'
+            )
+            Post.objects.create(author=author, text='Пост автора')
+            if follow:
+                Follow.objects.create(user=self.user, author=author)
+            return author
+
+        for name, follow in (
+            ('posts:profile_follow', False),
+            ('posts:profile_unfollow', True),
+        ):
+            with self.subTest(view=name):
+                self.assertQueriesStable(lambda: (
+                    'get',
+                    reverse(name, kwargs={'username': new_author(follow)}),
+                    None,
+                ))
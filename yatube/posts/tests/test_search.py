@@ -0,0 +1,92 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.conf import settings
+
+from ..models import Post
+from ..search import SearchResults
+
+User = get_user_model()
+POST_PER_PAGE = settings.POST_LIMIT_PER_PAGE
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.rare = Post.objects.create(
+            author=cls.user, text='Ёжик в тумане и длинная история про лес'
+        )
+        cls.frequent = Post.objects.create(
+            author=cls.user, text='Ёжик, ёжик, ёжик'
+        )
+        Post.objects.create(author=cls.user, text='Совсем про другое')
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def found(self, query):
+        return list(SearchResults(query))
+
+    def test_ranked_results(self):
+        """Выдача ранжируется, регистр и ё/е не мешают поиску."""
+        self.assertEqual(self.found('ежик'), [self.frequent, self.rare])
+        self.assertEqual(self.found('ЁЖИК лес'), [self.rare])
+        self.assertEqual(self.found('тума'), [self.rare])
+        self.assertEqual(self.found('!!!'), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при создании, правке и удалении поста."""
+        post = Post.objects.create(author=self.user, text='Новая заметка')
+        self.assertEqual(self.found('заметка'), [post])
+        post.text = 'Переписанный текст'
+        post.save()
+        self.assertEqual(self.found('заметка'), [])
+        self.assertEqual(self.found('переписанный'), [post])
+        post.delete()
+        self.assertEqual(self.found('переписанный'), [])
+
+    def test_search_page(self):
+        """Страница поиска пагинируется и сохраняет запрос в ссылках."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Массовый пост {x}')
+            for x in range(POST_PER_PAGE + 3)
+        )
+        url = reverse('posts:search')
+        call_command('rebuild_search_index', stdout=StringIO())
+        response = self.client.get(url, {'q': 'массовый'})
+        self.assertEqual(len(response.context['page_obj']), POST_PER_PAGE)
+        self.assertEqual(
+            response.context['page_obj'].paginator.count, POST_PER_PAGE + 3
+        )
+        self.assertContains(response, '?q=%D0%BC%D0%B0%D1%81')
+        response = self.client.get(url, {'q': 'массовый', 'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 3)
+        self.assertIsNone(self.client.get(url).context['page_obj'])
+
+    @override_settings(
+        POST_SEARCH_BACKEND='posts.search.SimpleSearchBackend'
+    )
+    def test_simple_backend(self):
+        """Запасной бэкенд без индекса ищет по вхождению всех слов."""
+        self.assertEqual(
+            set(self.found('история лес')), {self.rare}
+        )
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'ежик'}
+        )
+        self.assertEqual(
+            set(response.context['cl'].result_list),
+            {self.rare, self.frequent}
+        )
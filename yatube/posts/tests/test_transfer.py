@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post
+from ..search import SearchResults
+
+User = get_user_model()
+MODELS = ('group', 'post', 'comment', 'follow')
+
+
+class TransferCommandsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Текст, "в кавычках"\n'
+        )
+        Post.objects.create(author=cls.reader, text='Без группы')
+        Comment.objects.create(author=cls.reader, post=cls.post, text='Ок')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def snapshot(self):
+        return {
+            'group': list(Group.objects.values_list('slug', 'title')),
+            'post': list(Post.objects.order_by('pk').values_list(
+                'pk', 'text', 'pub_date', 'author__username', 'group__slug'
+            )),
+            'comment': list(Comment.objects.values_list(
+                'pk', 'post_id', 'author__username', 'text', 'pub_date'
+            )),
+            'follow': list(Follow.objects.values_list(
+                'user__username', 'author__username', 'pub_date'
+            )),
+        }
+
+    def roundtrip(self, file_format):
+        before = self.snapshot()
+        for name in MODELS:
+            call_command(
+                'export_content', name,
+                os.path.join(self.folder, f'{name}.{file_format}'),
+                format=file_format, stderr=StringIO(),
+            )
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        for name in MODELS:
+            call_command(
+                'import_content', name,
+                os.path.join(self.folder, f'{name}.{file_format}'),
+                format=file_format, skip_rebuild=name != 'follow',
+                stderr=StringIO(),
+            )
+        self.assertEqual(self.snapshot(), before)
+
+    def test_ndjson_roundtrip(self):
+        """Выгруженные данные загружаются обратно без потерь."""
+        self.roundtrip('ndjson')
+
+    def test_csv_roundtrip(self):
+        self.roundtrip('csv')
+
+    def test_import_rebuilds_derived_data(self):
+        """После импорта пересчитаны счётчики, ленты и индекс поиска."""
+        self.roundtrip('ndjson')
+        author = User.objects.get(username='author')
+        reader = User.objects.get(username='reader')
+        self.assertEqual(author.stats.posts_count, 1)
+        self.assertEqual(author.stats.followers_count, 1)
+        self.assertEqual(reader.feed_items.count(), 1)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comments_count, 1)
+        self.assertEqual(list(SearchResults('кавычках')), [self.post])
+
+    def test_import_skips_existing(self):
+        """Повторный импорт не дублирует записи."""
+        path = os.path.join(self.folder, 'post.ndjson')
+        call_command('export_content', 'post', path, stderr=StringIO())
+        call_command('import_content', 'post', path, stderr=StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+
+    def write(self, name, *lines):
+        path = os.path.join(self.folder, f'{name}.ndjson')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(''.join(line + '\n' for line in lines))
+        return path
+
+    def test_import_stops_on_id_collision(self):
+        """Чужой пост под тем же id не подменяет пост из дампа."""
+        path = self.write(
+            'post',
+            '{"id": 999, "text": "Новый", "author": "author", '
+            '"pub_date": "2020-01-01T00:00:00+00:00"}',
+            f'{{"id": {self.post.pk}, "text": "Другой", "author": "reader", '
+            '"pub_date": "2020-01-01T00:00:00+00:00"}',
+        )
+        with self.assertRaisesMessage(CommandError, 'строка 2'):
+            call_command('import_content', 'post', path, stderr=StringIO())
+        self.assertEqual(Post.objects.get(pk=self.post.pk).author, self.author)
+        self.assertFalse(Post.objects.filter(pk=999).exists())
+
+    def test_import_reports_missing_field(self):
+        path = self.write(
+            'comment',
+            f'{{"id": 999, "post": {self.post.pk}, "author": "reader", '
+            '"text": "Ок"}',
+        )
+        with self.assertRaisesMessage(CommandError, 'строка 1: нет поля'):
+            call_command('import_content', 'comment', path, stderr=StringIO())
+        self.assertEqual(Comment.objects.count(), 1)
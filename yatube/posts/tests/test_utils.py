@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.conf import settings
+from django.core.cache import cache
+
+from ..models import Group, Post
+from ..utils import CursorPage, decode_cursor
+
+User = get_user_model()
+POST_PER_PAGE = settings.POST_LIMIT_PER_PAGE
+
+
+@override_settings(POST_CURSOR_PAGINATION=True)
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_group',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Пост №{x}')
+            for x in range(POST_PER_PAGE + 5)
+        )
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def test_pages_follow_cursors(self):
+        """По курсорам страницы проходятся без пропусков и повторов."""
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        ):
+            with self.subTest(url=url):
+                first = self.client.get(url).context['page_obj']
+                self.assertIsInstance(first, CursorPage)
+                self.assertEqual(len(first), POST_PER_PAGE)
+                self.assertFalse(first.has_previous())
+                second = self.client.get(
+                    f'{url}?after={first.next_cursor}'
+                ).context['page_obj']
+                self.assertEqual(len(second), 5)
+                self.assertFalse(second.has_next())
+                seen = [post.pk for post in [*first, *second]]
+                self.assertEqual(len(set(seen)), POST_PER_PAGE + 5)
+                back = self.client.get(
+                    f'{url}?before={second.previous_cursor}'
+                ).context['page_obj']
+                self.assertEqual(
+                    [post.pk for post in back], [post.pk for post in first]
+                )
+
+    def test_broken_cursor_opens_first_page(self):
+        """Битый курсор не ломает страницу."""
+        self.assertIsNone(decode_cursor('не-курсор'))
+        response = self.client.get(reverse('posts:index') + '?after=xx')
+        self.assertEqual(len(response.context['page_obj']), POST_PER_PAGE)
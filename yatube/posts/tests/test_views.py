@@ -1,14 +1,25 @@
+import os
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase, override_settings
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
 from django.urls import reverse
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
 
+from .. import page_cache
+from ..cards import card_key
 from ..models import Group, Post, Comment, Follow
+from ..images import variant_name
+from ..thumbnails import PregeneratedThumbnailBackend, pregenerate
 
 User = get_user_model()
 POST_PER_PAGE = settings.POST_LIMIT_PER_PAGE
@@ -163,33 +174,51 @@ class PostPagesTests(TestCase):
         is_edit = response.context['form']
         self.assertTrue(is_edit)
 
-    # все работает
     def test_index_caches(self):
+        """Главная берётся из кеша, пока посты не меняются."""
         new_post = Post.objects.create(
             author=PostPagesTests.user,
             text='testt',
             group=PostPagesTests.group
         )
+        response_1 = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response_1, 'testt')
 
-        response_1 = self.authorized_client.get(
-            reverse('posts:index')
+        with CaptureQueriesContext(connection) as queries:
+            response_2 = self.authorized_client.get(reverse('posts:index'))
+        self.assertEqual(response_1.content, response_2.content)
+        self.assertFalse(
+            [query for query in queries if 'posts_post' in query['sql']]
         )
 
-        response_content_1 = response_1.content
         new_post.delete()
+        response_3 = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotContains(response_3, 'testt')
 
-        response_2 = self.authorized_client.get(
-            reverse('posts:index')
-        )
-        response_content_2 = response_2.content
-        self.assertEqual(response_content_1, response_content_2)
-        cache.clear()
+    def test_index_rebuilds_once(self):
+        """Пока страницу пересобирает другой запрос, отдаётся прежняя."""
+        url = reverse('posts:index')
+        self.client.get(url)
+        Post.objects.create(author=PostPagesTests.user, text='Новый пост')
+        lock_key = f'{page_cache._page_key("page=1")}:lock'
+        cache.add(lock_key, 1)
+        response = self.client.get(url)
+        self.assertNotContains(response, 'Новый пост')
+        cache.delete(lock_key)
+        response = self.client.get(url)
+        self.assertContains(response, 'Новый пост')
 
-        response_3 = self.authorized_client.get(
-            reverse('posts:index')
+    def test_index_page_params_share_entries(self):
+        """Неверный и слишком большой номер дают уже известные страницы."""
+        url = reverse('posts:index')
+        self.client.get(url)
+        self.client.get(url, {'page': '99999'})
+        with CaptureQueriesContext(connection) as queries:
+            for page in ('foo', '1', '100000', '-1'):
+                self.client.get(url, {'page': page})
+        self.assertFalse(
+            [query for query in queries if 'posts_post' in query['sql']]
         )
-        response_content_3 = response_3.content
-        self.assertNotEqual(response_content_2, response_content_3)
 
     def post_exist(self, page_context):
         if 'page_obj' in page_context:
@@ -280,3 +309,253 @@ class PostPagesTests(TestCase):
         )
         context_unfollow = response_unfollow.context
         self.assertEqual(len(context_unfollow['page_obj']), 0)
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Старый текст')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def get_card(self):
+        post = Post.objects.get(pk=self.post.pk)
+        return cache.get(card_key(post, 'profile'))
+
+    def test_card_is_cached_and_reused(self):
+        """Карточка отрисовывается один раз и берётся из кеша."""
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        self.authorized_client.get(url)
+        self.assertIn('Старый текст', self.get_card())
+        cache.set(card_key(self.post, 'profile'), 'карточка из кеша')
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'карточка из кеша')
+
+    def test_edit_and_comment_refresh_card(self):
+        """Правка поста и комментарий сбрасывают карточку."""
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        self.authorized_client.get(url)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Новый текст'}
+        )
+        self.assertIsNone(self.get_card())
+        self.assertContains(self.authorized_client.get(url), 'Новый текст')
+        version = Post.objects.get(pk=self.post.pk).card_version
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Комментарий'}
+        )
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).card_version, version + 1
+        )
+
+    def test_group_delete_refreshes_card(self):
+        """Удаление группы сбрасывает карточки её постов."""
+        group = Group.objects.create(title='Группа', slug='deleted')
+        Post.objects.filter(pk=self.post.pk).update(group=group)
+        version = Post.objects.get(pk=self.post.pk).card_version
+        group.delete()
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).card_version, version + 1
+        )
+
+    def test_only_name_change_refreshes_author_cards(self):
+        """Карточки автора сбрасывает смена имени, но не пароля."""
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-secret-42')
+        user.save()
+        self.assertEqual(Post.objects.get(pk=self.post.pk).card_version, 0)
+        user.first_name = 'Лев'
+        user.save()
+        self.assertEqual(Post.objects.get(pk=self.post.pk).card_version, 1)
+        user.save(update_fields=['email'])
+        self.assertEqual(Post.objects.get(pk=self.post.pk).card_version, 1)
+
+
+@override_settings(COMMENTS_PER_PAGE=3)
+class CommentPagesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        Comment.objects.bulk_create(
+            Comment(author=cls.user, post=cls.post, text=f'Комментарий {n}')
+            for n in range(7)
+        )
+
+    def test_first_page_is_limited(self):
+        """Под постом только первая страница комментариев."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.text for comment in comments],
+            ['Комментарий 0', 'Комментарий 1', 'Комментарий 2'],
+        )
+        self.assertTrue(comments.has_next())
+        self.assertContains(response, 'data-fragment=')
+
+    def test_fragment_loads_rest(self):
+        """Фрагмент отдаёт следующие страницы до последней."""
+        url = reverse('posts:comments', kwargs={'post_id': self.post.pk})
+        texts = []
+        after = ''
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, {'after': after})
+            self.assertTemplateUsed(response, 'posts/includes/comments.html')
+            self.assertNotContains(response, '<html')
+            comments = response.context['comments']
+            texts += [comment.text for comment in comments]
+            if not comments.has_next():
+                break
+            after = comments.next_cursor
+        self.assertEqual(texts, [f'Комментарий {n}' for n in range(7)])
+        # состояние страницы, пост и комментарии с авторами
+        self.assertLessEqual(len(queries), 4)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_FOLDER)
+class ThumbnailPregenerationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='thumb.gif',
+                content=(
+                    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+                    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+                    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+                    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+                    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+                    b'\x0A\x00\x3B'
+                ),
+                content_type='image/gif'
+            )
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_FOLDER, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_miss_serves_original_until_worker(self):
+        """Запрос миниатюру не рисует: её готовит задача вместе с копиями."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        backend = PregeneratedThumbnailBackend()
+        geometry, options = settings.POST_THUMBNAILS[0]
+        thumbnail = backend.thumbnail_file(
+            self.post.image, geometry, **options
+        )
+        response = Client().get(url)
+        self.assertContains(response, f'src="{self.post.image.url}"')
+        self.assertFalse(thumbnail.exists())
+        pregenerate(self.post.image.name)
+        stored = backend.lookup(self.post.image, geometry, **options)
+        self.assertEqual(stored.name, thumbnail.name)
+        with Image.open(thumbnail.storage.path(thumbnail.name)) as rendered:
+            self.assertEqual(rendered.size, (960, 339))
+
+    def test_list_page_prefetches_thumbnails(self):
+        """Миниатюры всей страницы ищутся одним запросом к БД."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text='Ещё пост', image=self.post.image)
+            for _ in range(3)
+        )
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        Client().get(url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            Client().get(url)
+        kv_queries = [
+            query for query in queries
+            if 'thumbnail_kvstore' in query['sql']
+        ]
+        self.assertEqual(len(kv_queries), 1)
+
+    def test_pregenerate_makes_variants(self):
+        """После загрузки готовятся копии без метаданных и srcset."""
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 800), 'red').save(
+            buffer, 'JPEG', exif=exif.tobytes()
+        )
+        post = Post.objects.create(
+            author=self.user,
+            text='Большая картинка',
+            image=SimpleUploadedFile('big.jpg', buffer.getvalue()),
+        )
+        pregenerate(post.image.name)
+        post.refresh_from_db()
+        self.assertEqual(post.image_variants, '320,640,960')
+        self.assertEqual(post.card_version, 1)
+        webp = os.path.join(
+            TEMP_MEDIA_FOLDER, variant_name(post.image.name, 960, 'webp')
+        )
+        with Image.open(webp) as variant:
+            self.assertEqual(variant.size, (960, 339))
+            self.assertFalse(variant.getexif())
+        response = Client().get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertContains(response, 'type="image/webp"')
+        jpeg = variant_name(post.image.name, 640, 'jpeg')
+        self.assertContains(response, f'{settings.MEDIA_URL}{jpeg} 640w')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_FOLDER)
+class ImageCleanupTests(TransactionTestCase):
+    """Файлы удаляются после коммита: нужны настоящие транзакции."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_FOLDER, ignore_errors=True)
+
+    def test_variants_deleted_with_post_and_on_image_change(self):
+        """Копии удаляются вместе с постом и при смене картинки."""
+        def upload(name):
+            buffer = BytesIO()
+            Image.new('RGB', (400, 300), 'red').save(buffer, 'JPEG')
+            return SimpleUploadedFile(name, buffer.getvalue())
+
+        def variant_files(name):
+            return [
+                os.path.join(
+                    TEMP_MEDIA_FOLDER, variant_name(name, 320, image_format)
+                )
+                for image_format in settings.POST_IMAGE_FORMATS
+            ]
+
+        user = User.objects.create_user(username='auth')
+        post = Post.objects.create(
+            author=user, text='Пост', image=upload('first.jpg')
+        )
+        first = post.image.name
+        pregenerate(first)
+        post.refresh_from_db()
+        self.assertTrue(all(map(os.path.exists, variant_files(first))))
+        post.image = upload('second.jpg')
+        post.save()
+        self.assertFalse(any(map(os.path.exists, variant_files(first))))
+        pregenerate(post.image.name)
+        post.refresh_from_db()
+        second = variant_files(post.image.name)
+        self.assertTrue(all(map(os.path.exists, second)))
+        post.delete()
+        self.assertFalse(any(map(os.path.exists, second)))
@@ -0,0 +1,197 @@
+"""Картинки постов, подготовленные заранее.
+
+После сохранения поста с новой картинкой её копии для srcset
+(posts.images) создаёт задача фоновой очереди (manage.py worker).
+Для постов, у которых копий ещё нет, шаблоны используют
+{% thumbnail %}: он только ищет готовую миниатюру в key-value
+хранилище sorl, а при промахе ставит картинку в очередь и отдаёт
+оригинал. Миниатюры POST_THUMBNAILS рисует та же задача, что и копии,
+поэтому Pillow во время запроса не работает.
+
+Копии и миниатюры удаляются вместе с постом и при смене картинки.
+
+Для страниц со списками prefetch_thumbnails заранее находит миниатюры
+всех постов страницы одним get_many к кешу и одним запросом к БД.
+"""
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.engines.pil_engine import Engine
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from core.tasks import task
+
+from .images import delete_variants, make_variants
+from .models import Post
+from .page_cache import invalidate
+
+CACHED_DB_KVSTORE = 'sorl.thumbnail.kvstores.cached_db_kvstore.KVStore'
+
+# картинки, уже поставленные в очередь этим процессом: промах миниатюры
+# на каждом просмотре не должен писать в базу
+SCHEDULED_MEMORY = 10_000
+_scheduled = set()
+_lock = threading.Lock()
+
+
+class PILEngine(Engine):
+    """Движок sorl для Pillow 10+, где нет Image.ANTIALIAS."""
+
+    def _scale(self, image, width, height):
+        return image.resize((width, height), resample=Image.LANCZOS)
+
+
+class PregeneratedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, который не создаёт миниатюры во время запроса.
+
+    Промах ставит картинку в очередь (schedule) и отдаёт оригинал.
+    """
+
+    def _options(self, source, options):
+        """Те же умолчания, что и в ThumbnailBackend.get_thumbnail."""
+        options = dict(options)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def thumbnail_file(self, file_, geometry_string, **options):
+        """ImageFile, под которым sorl хранит эту миниатюру."""
+        source = ImageFile(file_)
+        name = self._get_thumbnail_filename(
+            source, geometry_string, self._options(source, options)
+        )
+        return ImageFile(name, default.storage)
+
+    def lookup(self, file_, geometry_string, **options):
+        """Готовая миниатюра из key-value хранилища или None.
+
+        Сначала смотрит в результаты prefetch_thumbnails, сохранённые
+        на самом файле.
+        """
+        prefetched = getattr(file_, '_thumbnails', None)
+        key = _prefetch_key(geometry_string, options)
+        if prefetched is not None and key in prefetched:
+            return prefetched[key]
+        return default.kvstore.get(
+            self.thumbnail_file(file_, geometry_string, **options)
+        )
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        thumbnail = self.lookup(file_, geometry_string, **options)
+        if thumbnail:
+            return thumbnail
+        schedule(getattr(file_, 'name', file_))
+        return ImageFile(file_)
+
+
+def _prefetch_key(geometry_string, options):
+    return geometry_string, tuple(sorted(options.items()))
+
+
+def prefetch_thumbnails(posts):
+    """Находит миниатюры POST_THUMBNAILS для картинок всех posts."""
+    if thumbnail_settings.THUMBNAIL_KVSTORE != CACHED_DB_KVSTORE:
+        return posts
+    backend = PregeneratedThumbnailBackend()
+    wanted = {}
+    for post in posts:
+        if not post.image or post.image_variants:
+            continue
+        post.image._thumbnails = {}
+        for geometry, options in settings.POST_THUMBNAILS:
+            thumbnail = backend.thumbnail_file(post.image, geometry, **options)
+            wanted[add_prefix(thumbnail.key)] = (
+                post.image._thumbnails, _prefetch_key(geometry, options)
+            )
+    if not wanted:
+        return posts
+
+    kv_cache = default.kvstore.cache
+    values = kv_cache.get_many(list(wanted))
+    missing = [key for key in wanted if key not in values]
+    if missing:
+        stored = dict(
+            KVStoreModel.objects.filter(key__in=missing)
+            .values_list('key', 'value')
+        )
+        fetched = {key: stored.get(key, EMPTY_VALUE) for key in missing}
+        kv_cache.set_many(fetched, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(fetched)
+    for key, (prefetched, prefetch_key) in wanted.items():
+        value = values[key]
+        prefetched[prefetch_key] = (
+            None if value == EMPTY_VALUE else deserialize_image_file(value)
+        )
+    return posts
+
+
+@task
+def pregenerate(name):
+    """Создаёт копии и миниатюры картинки name, сбрасывает карточки."""
+    # пост удалили или сменили картинку, пока задача ждала в очереди
+    if not Post.objects.filter(image=name).exists():
+        return
+    widths = make_variants(name)
+    # для шаблонов, которые ещё видят пост без копий
+    renderer = ThumbnailBackend()
+    for geometry, options in settings.POST_THUMBNAILS:
+        renderer.get_thumbnail(name, geometry, **options)
+    Post.objects.filter(image=name).update(
+        image_variants=widths, card_version=F('card_version') + 1,
+        updated_at=timezone.now(),
+    )
+    invalidate()
+
+
+def schedule(name):
+    """Ставит подготовку картинки в очередь задач (core.tasks).
+
+    Задача записывается в текущей транзакции; повторные вызовы для той
+    же картинки не создают новых задач.
+    """
+    if not name:
+        return
+    with _lock:
+        if name in _scheduled:
+            return
+        if len(_scheduled) > SCHEDULED_MEMORY:
+            _scheduled.clear()
+        _scheduled.add(name)
+    pregenerate.delay(name, idempotency_key=f'pregenerate:{name}')
+
+
+def forget(name, widths):
+    """После коммита удаляет копии и миниатюры картинки name."""
+    if not name:
+        return
+
+    def delete():
+        # картинку могут разделять посты из импорта
+        if Post.objects.filter(image=name).exists():
+            return
+        delete_variants(name, widths)
+        delete_thumbnails(name, delete_file=False)
+        with _lock:
+            _scheduled.discard(name)
+
+    transaction.on_commit(delete)
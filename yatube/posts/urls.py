@@ -9,6 +9,7 @@ urlpatterns = [
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('search/', views.search, name='search'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
 
@@ -16,6 +17,8 @@ urlpatterns = [
          name='post_delete'),
     path('posts/<int:post_id>/comment/', views.add_comment,
          name='add_comment'),
+    path('posts/<int:post_id>/comments/', views.comments,
+         name='comments'),
     path(
         'posts/comments/<int:comment_id>/delete/',
         views.comment_delete, name='delete_comment'
@@ -1,9 +1,148 @@
+import base64
+from collections.abc import Sequence
+
 from django.conf import settings
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_SEPARATOR = '|'
+BATCH_SIZE = 1000
 
 
-def paginator(request, posts):
+def paginator(request, posts, cursor=None, field='pub_date', key='pk'):
+    if cursor is None:
+        cursor = settings.POST_CURSOR_PAGINATION
+    if cursor:
+        return cursor_paginator(request, posts, field, key)
     paginator = Paginator(posts, settings.POST_LIMIT_PER_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def chunked(iterable, size=BATCH_SIZE):
+    """Разбивает поток на списки по size элементов."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def encode_cursor(obj, field='pub_date', key='pk'):
+    """Упаковывает позицию записи (дата, id) в строку для URL.
+
+    obj — объект модели или словарь из values() с ключами field и key.
+    """
+    if isinstance(obj, dict):
+        date, pk = obj[field], obj[key]
+    else:
+        date, pk = getattr(obj, field), getattr(obj, key)
+    value = f'{date.isoformat()}{CURSOR_SEPARATOR}{pk}'
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Распаковывает курсор; для битого значения возвращает None."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value = base64.urlsafe_b64decode(padded.encode()).decode()
+        date_str, pk = value.rsplit(CURSOR_SEPARATOR, 1)
+        date = parse_datetime(date_str)
+        pk = int(pk)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return None
+    if date is None:
+        return None
+    return date, pk
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации.
+
+    Повторяет ту часть интерфейса Page, которую используют шаблоны,
+    но не знает ни номера страницы, ни общего числа записей.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def cursor_paginate(queryset, after=None, before=None, per_page=None,
+                    field='pub_date', descending=True, key='pk'):
+    """Возвращает CursorPage с записями после after или перед before.
+
+    Записи упорядочены по (field, key), поэтому каждая страница
+    выбирается по индексу одним запросом с LIMIT и без OFFSET/COUNT.
+    key — уникальный id записи, по умолчанию pk.
+    """
+    per_page = per_page or settings.POST_LIMIT_PER_PAGE
+    sign = '-' if descending else ''
+    ordering = (f'{sign}{field}', f'{sign}{key}')
+    reverse_ordering = tuple(
+        name[1:] if name.startswith('-') else f'-{name}'
+        for name in ordering
+    )
+    forward, backward = ('lt', 'gt') if descending else ('gt', 'lt')
+
+    def seek(position, lookup):
+        date, pk = position
+        return queryset.filter(
+            Q(**{f'{field}__{lookup}': date})
+            | Q(**{field: date, f'{key}__{lookup}': pk})
+        )
+
+    if before is not None:
+        rows = list(
+            seek(before, backward).order_by(*reverse_ordering)[:per_page + 1]
+        )
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_previous, has_next = has_more, True
+    else:
+        qs = queryset if after is None else seek(after, forward)
+        rows = list(qs.order_by(*ordering)[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = after is not None
+
+    next_cursor = previous_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor(rows[-1], field, key)
+    if rows and has_previous:
+        previous_cursor = encode_cursor(rows[0], field, key)
+    return CursorPage(rows, next_cursor, previous_cursor)
+
+
+def cursor_paginator(request, posts, field='pub_date', key='pk'):
+    """Курсорный аналог paginator: читает ?after= / ?before= из запроса."""
+    after = decode_cursor(request.GET.get('after', ''))
+    before = decode_cursor(request.GET.get('before', ''))
+    return cursor_paginate(
+        posts, after=after, before=before, field=field, key=key
+    )
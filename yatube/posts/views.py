@@ -1,17 +1,28 @@
+from django.conf import settings
 from django.shortcuts import get_object_or_404, render
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect
-from django.views.decorators.cache import cache_page
+from django.utils.http import urlencode
+
+from core.decorators import retry_on_locked
 
 from .models import Group, Post, User, Comment, Follow
 from .forms import PostForm, CommentForm
-from .utils import paginator
+from .utils import cursor_paginate, decode_cursor, paginator
+from .feed import FEED_CURSOR, FEED_ORDERING, follow_feed
+from .cards import attach_cards
+from .page_cache import cached_page
+from .thumbnails import schedule
+from .search import SearchResults
+from .concurrency import gather
+from .conditional import (
+    conditional_page, group_posts_state, post_detail_state, profile_state,
+)
 
 
-@cache_page(20, key_prefix='index_page')
 def index(request):
-    posts = Post.objects.select_related('group').all().order_by('-pub_date')
-    page_obj = paginator(request, posts)
+    posts = Post.objects.for_feed()
+    page_obj = attach_cards(cached_page(request, posts), 'index')
     context = {
         'page_obj': page_obj,
     }
@@ -19,10 +30,17 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@conditional_page(group_posts_state)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    page_obj = paginator(request, post_list)
+    group, page_obj = gather(
+        lambda: get_object_or_404(Group, slug=slug),
+        lambda: attach_cards(
+            paginator(request, Post.objects.filter(
+                group__slug=slug
+            ).for_feed()),
+            'group_list',
+        ),
+    )
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -30,14 +48,23 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_page(profile_state)
 def profile(request, username):
-    following = False
-    author = get_object_or_404(User, username=username)
-    if request.user.is_authenticated:
-        following = request.user.follower.filter(author=author).exists()
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    page_obj = paginator(request, posts)
+    # request.user читается только в текущем потоке
+    following, author, page_obj = gather(
+        lambda: request.user.is_authenticated and request.user.follower.filter(
+            author__username=username
+        ).exists(),
+        lambda: get_object_or_404(
+            User.objects.select_related('stats'), username=username
+        ),
+        lambda: attach_cards(
+            paginator(request, Post.objects.filter(
+                author__username=username
+            ).for_feed()),
+            'profile',
+        ),
+    )
     context = {
         'author': author,
         'page_obj': page_obj,
@@ -46,9 +73,39 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        page_obj = attach_cards(
+            paginator(request, SearchResults(query), cursor=False), 'index'
+        )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_params': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def comments_page(request, post_id):
+    """Страница комментариев поста по курсору ?after=, от старых к новым."""
+    return cursor_paginate(
+        Comment.objects.filter(post_id=post_id).for_post(),
+        after=decode_cursor(request.GET.get('after', '')),
+        per_page=settings.COMMENTS_PER_PAGE,
+        descending=False,
+    )
+
+
+@conditional_page(post_detail_state)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post, comments = gather(
+        lambda: get_object_or_404(
+            Post.objects.select_related('author__stats', 'group'), pk=post_id
+        ),
+        lambda: comments_page(request, post_id),
+    )
     form = CommentForm()
     context = {
         'post': post,
@@ -58,7 +115,19 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+@conditional_page(post_detail_state)
+def comments(request, post_id):
+    """Фрагмент HTML со следующей страницей комментариев."""
+    post = get_object_or_404(Post.objects.only('author_id'), pk=post_id)
+    context = {
+        'post': post,
+        'comments': comments_page(request, post_id),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
 @login_required
+@retry_on_locked
 def post_create(request):
     template = 'posts/create_post.html'
     form = PostForm(
@@ -69,6 +138,8 @@ def post_create(request):
         temp_form = form.save(commit=False)
         temp_form.author = request.user
         temp_form.save()
+        if 'image' in form.changed_data:
+            schedule(temp_form.image.name)
         return redirect(
             'posts:profile', temp_form.author
         )
@@ -76,6 +147,7 @@ def post_create(request):
 
 
 @login_required
+@retry_on_locked
 def post_edit(request, post_id):
     template = 'posts/create_post.html'
     post = get_object_or_404(Post, pk=post_id)
@@ -89,7 +161,12 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
-        form.save()
+        post = form.save(commit=False)
+        if 'image' in form.changed_data:
+            post.image_variants = ''
+        post.save()
+        if 'image' in form.changed_data:
+            schedule(post.image.name)
         return redirect(
             'posts:post_detail', post_id
         )
@@ -99,6 +176,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@retry_on_locked
 def post_delete(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if post.author == request.user:
@@ -107,6 +185,7 @@ def post_delete(request, post_id):
 
 
 @login_required
+@retry_on_locked
 def add_comment(request, post_id):
     form = CommentForm(request.POST or None)
     if form.is_valid():
@@ -120,8 +199,11 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     title = 'Публикации избранных авторов'
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginator(request, posts)
+    posts = follow_feed(request.user).for_feed(FEED_ORDERING)
+    field, key = FEED_CURSOR
+    page_obj = attach_cards(
+        paginator(request, posts, field=field, key=key), 'follow'
+    )
     context = {
         'title': title,
         'page_obj': page_obj,
@@ -130,6 +212,7 @@ def follow_index(request):
 
 
 @login_required
+@retry_on_locked
 def profile_follow(request, username):
     follow_author = get_object_or_404(User, username=username)
     if follow_author != request.user:
@@ -138,6 +221,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@retry_on_locked
 def profile_unfollow(request, username):
     follow_author = get_object_or_404(User, username=username)
     data_follow = request.user.follower.filter(author=follow_author)
@@ -147,6 +231,7 @@ def profile_unfollow(request, username):
 
 
 @login_required
+@retry_on_locked
 def comment_delete(request, comment_id):
     comment = get_object_or_404(Comment, pk=comment_id)
     if comment.author == request.user:
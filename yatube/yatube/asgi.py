@@ -0,0 +1,19 @@
+"""
+ASGI config for yatube project.
+
+Django 2.2 has no ASGI handler of its own, so the WSGI application is
+served through asgiref's WsgiToAsgi adapter: each request still runs
+synchronously in the adapter's thread pool, so this entry point gives
+no concurrency benefit over WSGI. Run with any ASGI server, e.g.:
+
+    uvicorn yatube.asgi:application --workers 4
+"""
+
+import os
+
+from asgiref.wsgi import WsgiToAsgi
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = WsgiToAsgi(get_wsgi_application())
@@ -11,9 +11,80 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import sys
+
+# запущены тесты (manage.py test или pytest)
+TESTING: bool = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
 
 POST_LIMIT_PER_PAGE: int = 10
 LIMIT_PAGES_4TEST: int = 15
+# комментарии под постом подгружаются страницами по столько штук
+COMMENTS_PER_PAGE: int = 20
+# потоки для независимых запросов одного представления, общие на
+# процесс (posts.concurrency): при нехватке запрос выполняет их сам;
+# 0 — выполнять по очереди
+VIEW_QUERY_THREADS: int = 4
+# фоновая очередь (core.tasks, manage.py worker): потоки воркера,
+# попытки задачи, пауза перед первым повтором (дальше вдвое больше),
+# через сколько секунд взятая задача считается брошенной и сколько
+# дней хранить выполненные
+TASK_WORKER_THREADS: int = 4
+TASK_MAX_ATTEMPTS: int = 3
+TASK_RETRY_DELAY: int = 10
+TASK_STALE_AFTER: int = 10 * 60
+TASK_KEEP_DONE_DAYS: int = 7
+# наибольший ?limit= страницы JSON API
+API_MAX_LIMIT: int = 100
+# курсорная пагинация (?after=/?before=) вместо номеров страниц
+POST_CURSOR_PAGINATION: bool = False
+# авторы с большим числом подписчиков читаются в ленту напрямую,
+# а не раскладываются по лентам читателей при публикации
+FEED_FANOUT_MAX_FOLLOWERS: int = 1000
+# до стольких подписчиков пост раскладывается сразу, больше — задачей
+FEED_FANOUT_INLINE_MAX: int = 100
+# сколько последних постов автора добавить в ленту сразу при подписке;
+# остальные посты догружает задача очереди (posts.feed.backfill)
+FEED_BACKFILL_INLINE: int = 500
+# сколько секунд хранить отрисованную карточку поста
+POST_CARD_CACHE_TIMEOUT: int = 60 * 60
+# страницы главной сбрасываются по событиям, срок жизни — запасной
+INDEX_PAGE_CACHE_TIMEOUT: int = 5 * 60
+INDEX_PAGE_LOCK_TIMEOUT: int = 10
+# кеш: 'locmem' — в памяти процесса, 'sqlite' — общий файл для всех
+# воркеров, 'tiered' — общий файл и короткоживущая копия в процессе;
+# тесты по умолчанию не трогают общий файл разработчика
+CACHE_MODE: str = os.environ.get(
+    'YATUBE_CACHE', 'locmem' if TESTING else 'tiered'
+)
+# сколько секунд процесс держит значение из общего кеша у себя
+CACHE_LOCAL_TIMEOUT: int = 5
+# размеры миниатюр sorl для постов, у которых ещё нет копий картинки;
+# должны совпадать с {% thumbnail %} в шаблонах
+POST_THUMBNAILS: list = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+# ширины копий картинки для srcset и их форматы: последний формат —
+# запасной для браузеров без поддержки остальных; 'avif' можно
+# поставить первым, если Pillow собран с libavif
+POST_IMAGE_WIDTHS: tuple = (320, 640, 960, 1920)
+POST_IMAGE_FORMATS: tuple = ('webp', 'jpeg')
+POST_IMAGE_QUALITY: int = 80
+# полнотекстовый поиск: индекс FTS5 для SQLite или
+# 'posts.search.SimpleSearchBackend' (без индекса) для других баз
+POST_SEARCH_BACKEND: str = 'posts.search.SQLiteFTSBackend'
+# до скольких строк админка считает записи списка точно; больше —
+# оценка по статистике таблицы
+ADMIN_EXACT_COUNT_LIMIT: int = 10_000
+# сессии: 'hybrid' — данные в подписанной cookie, отзыв при выходе
+# записывается в таблицу RevokedSession (core.session_backends);
+# 'cached_db' и 'db' — в базе
+SESSION_MODE: str = os.environ.get('YATUBE_SESSIONS', 'hybrid')
+# сколько секунд пользователь запроса хранится в кеше
+USER_CACHE_TIMEOUT: int = 15 * 60
+# доля запросов, для которых пишутся Server-Timing и сводка /metrics/
+METRICS_SAMPLE_RATE: float = float(
+    os.environ.get('YATUBE_METRICS_SAMPLE_RATE', 1.0)
+)
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -23,8 +94,27 @@ LOGIN_REDIRECT_URL = 'posts:index'
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-#  подключаем движок filebased.EmailBackend
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# письма ставятся в очередь и уходят пачками из фонового потока
+# (core.mail_backends) через EMAIL_DELIVERY_BACKEND: по умолчанию
+# в файлы EMAIL_FILE_PATH, SMTP включается явно —
+# YATUBE_EMAIL_DELIVERY=django.core.mail.backends.smtp.EmailBackend
+EMAIL_BACKEND = 'core.mail_backends.QueuedEmailBackend'
+EMAIL_DELIVERY_BACKEND = os.environ.get(
+    'YATUBE_EMAIL_DELIVERY',
+    'django.core.mail.backends.filebased.EmailBackend'
+)
+EMAIL_HOST = os.environ.get('YATUBE_EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('YATUBE_EMAIL_PORT', 1025))
+# писем в одной пачке, писем в секунду (0 — без ограничения), секунд
+# простоя до закрытия соединения и ожидания отправки при остановке
+EMAIL_BATCH_SIZE = 50
+EMAIL_RATE_LIMIT = 10
+EMAIL_CONNECTION_IDLE = 30
+EMAIL_FLUSH_TIMEOUT = 10
+# попыток отправить пачку и пауза перед первым повтором в секундах
+# (дальше вдвое больше)
+EMAIL_SEND_ATTEMPTS = 3
+EMAIL_RETRY_DELAY = 1
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
@@ -51,6 +141,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -61,6 +152,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,7 +167,7 @@ ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -98,14 +191,90 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # сколько секунд держать соединение между запросами
+        'CONN_MAX_AGE': int(os.environ.get('YATUBE_CONN_MAX_AGE', 60)),
+        # сколько секунд ждать, пока другой процесс освободит базу
+        'OPTIONS': {'timeout': 5},
     }
 }
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# выполняются на каждом новом соединении с SQLite (core.signals)
+SQLITE_PRAGMAS: dict = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # в КиБ, если отрицательное
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+SQLITE_READONLY_PRAGMAS: tuple = ('mmap_size', 'cache_size', 'temp_store')
+# повторы представлений с записью при «database is locked»
+DATABASE_WRITE_RETRIES: int = 3
+DATABASE_RETRY_DELAY: float = 0.05
+# копии базы только для чтения: пути к файлам через запятую; файлы
+# обновляет команда sync_replicas
+DATABASE_REPLICA_FILES: list = [
+    name for name in os.environ.get('YATUBE_DB_REPLICAS', '').split(',')
+    if name
+]
+for number, name in enumerate(DATABASE_REPLICA_FILES, 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{name}?mode=ro',
+        'OPTIONS': {'uri': True},
+        # sync_replicas подменяет файл: старое соединение читало бы
+        # прежнюю копию
+        'CONN_MAX_AGE': 0,
+        'TEST': {'MIRROR': 'default'},
     }
+DATABASE_REPLICAS: list = [
+    f'replica{number}'
+    for number in range(1, len(DATABASE_REPLICA_FILES) + 1)
+]
+DATABASE_ROUTERS = ['core.db_routers.PrimaryReplicaRouter']
+# сколько секунд после записи сессия читает только с основной базы
+DATABASE_STICKY_SECONDS: int = 10
+DATABASE_STICKY_COOKIE: str = 'db_primary'
+# служебные записи (очередь задач, хранилище миниатюр sorl): после них
+# читать с основной базы незачем
+DATABASE_STICKY_IGNORE: tuple = ('core.task', 'thumbnail.kvstore')
+CACHE_FILE = os.environ.get(
+    'YATUBE_CACHE_FILE', os.path.join(BASE_DIR, 'cache.sqlite3')
+)
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'core.cache_backends.CountingLocMemCache',
+    },
+    'sqlite': {
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': CACHE_FILE,
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    },
+    'tiered': {
+        'BACKEND': 'core.cache_backends.TieredCache',
+        'LOCATION': 'default',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_TIMEOUT': CACHE_LOCAL_TIMEOUT,
+            # токен поколения ленты и пользователь запроса (смена пароля,
+            # блокировка) должны меняться во всех процессах сразу
+            'LOCAL_BYPASS': ['index_page:generation', 'user:'],
+        },
+    },
 }
 
+CACHES = {'default': CACHE_BACKENDS[CACHE_MODE]}
+if CACHE_MODE == 'tiered':
+    CACHES['shared'] = CACHE_BACKENDS['sqlite']
+
+SESSION_ENGINES = {
+    'hybrid': 'core.session_backends',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'db': 'django.contrib.sessions.backends.db',
+}
+SESSION_ENGINE = SESSION_ENGINES[SESSION_MODE]
+AUTHENTICATION_BACKENDS = ['core.auth_backends.CachedModelBackend']
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -145,3 +314,21 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+THUMBNAIL_BACKEND = 'posts.thumbnails.PregeneratedThumbnailBackend'
+THUMBNAIL_ENGINE = 'posts.thumbnails.PILEngine'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # DEBUG — строка с замерами на каждый запрос из выборки
+        'core.middleware': {
+            'handlers': ['console'],
+            'level': os.environ.get('YATUBE_METRICS_LOG_LEVEL', 'WARNING'),
+        },
+    },
+}